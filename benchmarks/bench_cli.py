@@ -0,0 +1,97 @@
+"""
+End to end benchmark of every CLI mode against the local mock nexus.
+
+    python -m benchmarks.bench_cli --components 20000 --latency 0.005 --json bench.json
+
+Each mode runs the real CLI in a subprocess against a fresh mock repository and records the wall time, the
+requests received by the server, the peak RSS of the CLI process and the throughput (repository components
+handled per second).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from nexushousekeeper.mocknexus import MockNexus
+
+# Runs the CLI and reports its peak RSS. VmHWM is used rather than getrusage which also accounts for the memory
+# of the benchmark process inherited before exec.
+CLI = """
+import atexit, resource, sys
+def report():
+    try:
+        with open('/proc/self/status') as status:
+            peak = [line.split()[1] for line in status if line.startswith('VmHWM')][0]
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sys.stderr.write('peak_rss_kb=%s\\n' % peak)
+atexit.register(report)
+sys.argv[0] = 'nexushousekeeper'
+from nexushousekeeper.nexushousekeeper import main
+main()
+"""
+
+MODES = {
+    "show": ["-s"],
+    "keep-last": ["-l", "3"],
+    "version-match": ["--version-match", "1.1"],
+    "version-match-groups": ["--version-match", "1.1", "--groupid", "org.example.g0,org.example.g1"],
+    "version": ["--version", "1.2.0-SNAPSHOT"],
+    "groupid": ["--groupid", "org.example.g0", "--version", "1.2.0-SNAPSHOT"],
+}
+
+
+def run_mode(mode: str, args) -> dict:
+    with MockNexus(args.components, args.assets, page_size=args.page_size, latency=args.latency,
+                   error_rate=args.error_rate, with_file_size=not args.no_file_size) as nexus:
+        command = [sys.executable, "-c", CLI, "-u", "user", "-p", "password",
+                   "-r", nexus.repository, "--nexus-url", nexus.rest_url] + MODES[mode] + args.extra
+        start = time.perf_counter()
+        process = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        elapsed = time.perf_counter() - start
+        error = process.stderr.decode()
+        if process.returncode != 0:
+            raise RuntimeError("%s failed:\n%s" % (mode, error))
+        peak_rss = int(error.rsplit("peak_rss_kb=", 1)[1].split()[0])
+        return {
+            'mode': mode,
+            'wall_time': round(elapsed, 3),
+            'requests': nexus.total_requests,
+            'requests_by_endpoint': {"%s %s" % key: count for key, count in sorted(nexus.counts.items())},
+            'peak_rss_kb': peak_rss,
+            'deleted': args.components - len(nexus.components),
+            'components_per_s': round(args.components / elapsed, 1),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="end to end CLI benchmark")
+    parser.add_argument("--components", type=int, default=10000)
+    parser.add_argument("--assets", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-file-size", action="store_true")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("extra", nargs=argparse.REMAINDER, help="extra CLI arguments, e.g. -- --dryrun")
+    args = parser.parse_args()
+    args.extra = [arg for arg in args.extra if arg != "--"]
+
+    results = []
+    print("%-20s %10s %10s %12s %9s %14s" % ("mode", "time (s)", "requests", "peak RSS kB", "deleted",
+                                              "components/s"))
+    for mode in args.modes.split(","):
+        result = run_mode(mode, args)
+        results.append(result)
+        print("%-20s %10.3f %10d %12d %9d %14.1f" % (mode, result['wall_time'], result['requests'],
+                                                     result['peak_rss_kb'], result['deleted'],
+                                                     result['components_per_s']))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Listing throughput with and without page read-ahead, against the mock nexus with injected latency.
+
+    python -m benchmarks.bench_pagination --latency 0.02 --work 0.02
+
+``--work`` simulates the downstream processing time of a page (sizing, filtering, deletion).
+"""
+import argparse
+import time
+
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+
+
+def run(nexus, prefetch, work):
+    handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, prefetch=prefetch)
+    nexus.reset_counts()
+    start = time.perf_counter()
+    pages = 0
+    for _ in handler._iter_component_pages(handler._get_all_components):
+        pages += 1
+        time.sleep(work)
+    elapsed = time.perf_counter() - start
+    print("prefetch=%-3d pages=%-6d requests=%-6d time=%.3fs throughput=%.1f pages/s"
+          % (prefetch, pages, nexus.total_requests, elapsed, pages / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pagination read-ahead benchmark")
+    parser.add_argument("--components", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency per request in seconds")
+    parser.add_argument("--work", type=float, default=0.02, help="downstream processing time per page in seconds")
+    parser.add_argument("--depths", default="0,1,2,4", help="comma separated prefetch depths to compare")
+    args = parser.parse_args()
+
+    with MockNexus(args.components, page_size=args.page_size, latency=args.latency) as nexus:
+        for depth in args.depths.split(","):
+            run(nexus, int(depth), args.work)
+
+
+if __name__ == "__main__":
+    main()
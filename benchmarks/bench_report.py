@@ -0,0 +1,89 @@
+"""
+Size report time and memory for growing repositories.
+
+    python -m benchmarks.bench_report --sizes 10000,100000,1000000
+
+Compares the legacy nested dicts of formatted strings and full tables with the columns, their group-by and top
+tables, on synthetic components (the listing and sizing are not measured). Tables are rendered to memory, memory
+is the peak traced by tracemalloc in a second run.
+"""
+import argparse
+import io
+import time
+import tracemalloc
+
+from hurry.filesize import size
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.bench_retention import generate
+from nexushousekeeper.columns import ComponentColumns
+from nexushousekeeper.mavenversion import parse_version
+
+
+def render(tables):
+    console = Console(file=io.StringIO(), width=120)
+    for table in tables:
+        console.print(table)
+
+
+def _table(rows, *columns):
+    table = Table(show_header=True)
+    for column in columns:
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*row)
+    return table
+
+
+def legacy(components):
+    aggregates = {}
+    for component in components:
+        versions = aggregates.setdefault(component['group'] + ":" + component['name'], {})
+        version = parse_version(component['version']).base_version
+        versions[version] = versions.get(version, 0) + 1024
+    as_string = {key: {version + " [" + size(version_size) + "]" for version, version_size in versions.items()}
+                 for key, versions in aggregates.items()}
+    by_version = {}
+    for versions in aggregates.values():
+        for version, version_size in versions.items():
+            by_version[version] = by_version.get(version, 0) + version_size
+    render([_table(((key, ", ".join(versions)) for key, versions in as_string.items()), "Name", "Versions"),
+            _table(((version, size(version_size)) for version, version_size in by_version.items()),
+                   "Versions", "Size")])
+
+
+def columnar(components):
+    columns = ComponentColumns()
+    for component in components:
+        columns.append(component, 1024)
+    tables = [columns.top(by, 20) for by in ('artifact', 'version', 'group')] + [columns.totals('age')]
+    render([_table(((label, size(total_size), str(count)) for label, total_size, count in rows),
+                   "Name", "Size", "Components") for rows in tables])
+
+
+def measure(fun, components):
+    start = time.perf_counter()
+    fun(components)
+    elapsed = time.perf_counter() - start
+    # traced separately, tracemalloc slows down allocations
+    tracemalloc.start()
+    fun(components)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="size report benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    for count in map(int, args.sizes.split(",")):
+        components = generate(count)
+        for name, fun in (("legacy", legacy), ("columns", columnar)):
+            elapsed, peak = measure(fun, components)
+            print("%-8s %-8d components  %.3fs  peak %s" % (name, count, elapsed, size(peak)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Retention planning time for growing repositories.
+
+    python -m benchmarks.bench_retention --sizes 10000,100000,1000000
+
+The legacy planner is the one keep_lasts_versions used before the retention module, reimplemented here: a cache of
+the newest build of each (artifact, short version), regrouped by artifact, then a list membership scan which is
+quadratic, so it is only run up to --legacy-limit components. The timeline emits the components to delete in one
+streaming pass.
+
+The two planners don't select the same components: the legacy one sorts short versions as strings (1.10 < 1.9), the
+timeline compares them like maven. The number of components only one of them deletes is reported.
+"""
+import argparse
+import datetime
+import re
+import time
+
+from nexushousekeeper import retention
+
+SNAPSHOT_FINDER = re.compile(r'(\d*\.?\d*\.?\d*)' + r"-?" + r"(\d{8}\.\d{6})" + r"?-?\d*")
+
+
+def generate(count: int) -> list:
+    components = []
+    for i in range(count):
+        version = "%d.%d.%d" % (i % 7, i // 7 % 13, i // 91 % 5)
+        if i % 3 == 0:
+            version += "-202101%02d.%02d%02d%02d-%d" % (i % 28 + 1, i % 24, i // 24 % 60, i % 60, i % 9 + 1)
+        components.append({'id': str(i), 'group': "org.example.g%d" % (i % 50),
+                           'name': "artifact%d" % (i // 455), 'version': version})
+    return components
+
+
+def _most_recent_artefact_for_version(versions_cache: dict, component: dict) -> None:
+    dategroup = SNAPSHOT_FINDER.match(component["version"])
+    short_version = dategroup.group(1)
+    key = (component["group"] + ":" + component["name"], short_version)
+    if dategroup.group(2):
+        date = datetime.datetime.strptime(dategroup.group(2), '%Y%m%d.%H%M%S')
+        if key not in versions_cache or date > versions_cache[key]["date"]:
+            versions_cache[key] = {"date": date, "component": component}
+    elif dategroup.group(1):
+        versions_cache[key] = {"component": component}
+
+
+def _last_versions(components, count) -> list:
+    versions_cache = {}
+    for component in components:
+        _most_recent_artefact_for_version(versions_cache, component)
+    version_by_component = {}
+    for (artifact, short_version), cached in versions_cache.items():
+        version_by_component.setdefault(artifact, {})[short_version] = cached["component"]
+    to_keep = []
+    for versions in version_by_component.values():
+        to_keep += [component for _, component in sorted(versions.items(), reverse=True)[0:count]]
+    return to_keep
+
+
+def legacy(components, count):
+    to_keep = _last_versions(components, count)
+    return [item for item in components if item not in to_keep]
+
+
+def timeline(components, count):
+    return list(retention.VersionTimeline(count).deletable(components))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="retention planning benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--keep", type=int, default=3)
+    parser.add_argument("--legacy-limit", type=int, default=10000)
+    args = parser.parse_args()
+    for count in map(int, args.sizes.split(",")):
+        components = generate(count)
+        start = time.perf_counter()
+        to_delete = timeline(components, args.keep)
+        print("timeline %-7d components  %-8d to delete  %.3fs" % (count, len(to_delete),
+                                                                   time.perf_counter() - start))
+        if count <= args.legacy_limit:
+            start = time.perf_counter()
+            legacy_to_delete = legacy(components, args.keep)
+            print("legacy   %-7d components  %-8d to delete  %.3fs" % (count, len(legacy_to_delete),
+                                                                       time.perf_counter() - start))
+            timeline_ids = {component['id'] for component in to_delete}
+            legacy_ids = {component['id'] for component in legacy_to_delete}
+            print("         %-7s only deleted by the legacy planner: %d, by the timeline: %d"
+                  % ("", len(legacy_ids - timeline_ids), len(timeline_ids - legacy_ids)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare the number of HTTP requests and the wall time needed to size a repository.
+
+    python -m benchmarks.bench_sizing --components 2000
+
+* legacy: one FuturesSession per component and one HEAD request per asset (behaviour before fileSize support)
+* fileSize: sizes read from the component listing
+* fallback: server without fileSize (Nexus < 3.30), HEAD requests through the shared pool
+* adaptive: same server, HEAD requests sent by the event loop with the adaptive concurrency limit
+* cached: second adaptive run with a --size-cache file, no HEAD request left
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import as_completed
+
+from requests_futures.sessions import FuturesSession
+
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+from nexushousekeeper.sizeresolver import SizeCache
+
+
+def legacy_components_size(handler, component):
+    size = 0
+    with FuturesSession() as session:
+        futures = [session.head(asset['downloadUrl'], auth=handler.cred) for asset in component['assets']]
+        for future in as_completed(futures):
+            size += int(future.result().headers['Content-Length'])
+    return size
+
+
+def run(label, nexus, legacy=False, adaptive=False, size_cache=None):
+    handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, show_progress=False,
+                                   size_cache=SizeCache(size_cache) if size_cache else None)
+    components = handler._get_components_as_list(handler._get_all_components)
+    nexus.reset_counts()
+    start = time.perf_counter()
+    if legacy:
+        total = sum(legacy_components_size(handler, component) for component in components)
+    elif adaptive:
+        total = handler.collect_columns(components, True).total_size
+    else:
+        total = sum(handler._components_size(component) for component in components)
+    elapsed = time.perf_counter() - start
+    print("%-10s components=%-7d requests=%-8d bytes=%-12d time=%.3fs"
+          % (label, len(components), nexus.total_requests, total, elapsed))
+    handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asset sizing benchmark")
+    parser.add_argument("--components", type=int, default=2000)
+    parser.add_argument("--assets", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.002, help="latency of the adaptive runs")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="share of 429/503 of the adaptive runs")
+    args = parser.parse_args()
+
+    with MockNexus(args.components, args.assets, page_size=args.page_size) as nexus:
+        run("legacy", nexus, legacy=True)
+        run("fileSize", nexus)
+    with MockNexus(args.components, args.assets, page_size=args.page_size, with_file_size=False) as nexus:
+        run("fallback", nexus)
+    with MockNexus(args.components, args.assets, page_size=args.page_size, with_file_size=False,
+                   latency=args.latency, error_rate=args.error_rate) as nexus, \
+            tempfile.TemporaryDirectory() as directory:
+        run("adaptive", nexus, adaptive=True, size_cache=os.path.join(directory, "sizes.db"))
+        run("cached", nexus, adaptive=True, size_cache=os.path.join(directory, "sizes.db"))
+
+
+if __name__ == "__main__":
+    main()
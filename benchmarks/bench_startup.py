@@ -0,0 +1,88 @@
+"""
+Startup time of the CLI, for the short runs of cron jobs: -h, an argument error and a subcommand help.
+
+    python -m benchmarks.bench_startup --runs 20
+
+Each case runs the CLI in a fresh interpreter with ``python -X importtime``. The median wall time, the cumulative
+import time of the CLI module and the modules taking the longest to import are reported, as well as the heavy
+modules (http, rich, asyncio...) loaded although the arguments didn't require them. The import time of the CLI
+module is also reported relative to the one of argparse in the same process, the budget the tests enforce.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+CLI = "import sys; from nexushousekeeper.nexushousekeeper import main; main(sys.argv[1:])"
+
+CASES = {
+    "help": ["-h"],
+    "subcommand-help": ["delete", "-h"],
+    "argument-error": ["-u", "user"],
+}
+
+# imported only once a command actually runs
+HEAVY_MODULES = ("asyncio", "requests", "rich", "hurry", "sqlite3", "concurrent", "numpy")
+
+# maximum cumulative import time of the CLI module, in import times of argparse measured in the same process so the
+# budget doesn't depend on the speed of the machine. argparse and the CLI module itself take about 3.
+IMPORT_BUDGET = 10
+
+
+def import_times(stderr: str) -> dict:
+    """
+    :param stderr: standard error of python -X importtime
+    :return: {module: (self microseconds, cumulative microseconds)}
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def run_case(args: list) -> tuple:
+    """
+    :return: (wall time in seconds, import times)
+    """
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", CLI] + args,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return time.perf_counter() - start, import_times(process.stderr.decode())
+
+
+def heavy_modules(times: dict) -> list:
+    return sorted(module for module in times if module.split(".")[0] in HEAVY_MODULES)
+
+
+def relative_import_time(times: dict) -> float:
+    """
+    :return: the cumulative import time of the CLI module divided by the one of argparse, see IMPORT_BUDGET
+    """
+    return times["nexushousekeeper.nexushousekeeper"][1] / max(times["argparse"][1], 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports displayed")
+    args = parser.parse_args()
+
+    print("%-16s %12s %16s %10s %8s" % ("case", "median (ms)", "cli import (ms)", "/argparse", "heavy"))
+    for case, case_args in CASES.items():
+        runs = [run_case(case_args) for _ in range(args.runs)]
+        times = runs[-1][1]
+        cli_import = times.get("nexushousekeeper.nexushousekeeper", (0, 0))[1]
+        print("%-16s %12.1f %16.1f %10.1f %8d" % (case, statistics.median(wall for wall, _ in runs) * 1000,
+                                                  cli_import / 1000, relative_import_time(times),
+                                                  len(heavy_modules(times))))
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    print("slowest imports: " + ", ".join("%s %.1fms" % (module, self_us / 1000)
+                                           for module, (self_us, _) in slowest))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Parse and sort a large number of version strings.
+
+    python -m benchmarks.bench_versions --count 1000000
+"""
+import argparse
+import random
+import time
+from operator import attrgetter
+
+from nexushousekeeper.mavenversion import MavenVersion, comparable_key, parse_version
+
+
+def generate(count: int) -> list:
+    rnd = random.Random(42)
+    qualifiers = ["", "", "", "-SNAPSHOT", "-rc1", "-alpha2", "-beta", "-sp1"]
+    versions = []
+    for _ in range(count):
+        version = "%d.%d.%d" % (rnd.randrange(5), rnd.randrange(30), rnd.randrange(50))
+        if rnd.random() < 0.3:
+            version += "-2021%02d%02d.%06d-%d" % (rnd.randrange(1, 13), rnd.randrange(1, 29),
+                                                   rnd.randrange(235959), rnd.randrange(1, 20))
+        else:
+            version += rnd.choice(qualifiers)
+        versions.append(version)
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="version parsing benchmark")
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+    versions = generate(args.count)
+    print("%d versions, %d distinct" % (len(versions), len(set(versions))))
+
+    comparable_key.cache_clear()
+    start = time.perf_counter()
+    parsed = [MavenVersion(version) for version in versions]
+    print("parse (no cache)    %.3fs" % (time.perf_counter() - start))
+
+    parse_version.cache_clear()
+    start = time.perf_counter()
+    parsed = [parse_version(version) for version in versions]
+    print("parse (cached)      %.3fs" % (time.perf_counter() - start))
+
+    start = time.perf_counter()
+    parsed.sort(key=attrgetter('key'))
+    print("sort parsed         %.3fs" % (time.perf_counter() - start))
+
+    start = time.perf_counter()
+    sorted(versions)
+    print("sort strings (ref.) %.3fs" % (time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Bulk deletion of nexus components.
+
+When the script api is available (``v1/script``, disabled by default since Nexus 3.21), the ids to delete are
+sent by chunks to a groovy script deleting them server side, one request per chunk. Otherwise, or when the
+script fails, every component is deleted with ``DELETE v1/components/{id}`` through the pooled HTTP engine,
+limited to a maximum rate and retried with backoff on 429/5xx. A component which still can't be deleted is
+recorded as failed instead of aborting the run, failures are retried at the end with retry_failures().
+"""
+import asyncio
+import json
+import time
+
+import requests
+
+from .httpengine import RateLimiter
+
+SCRIPT_NAME = "nexushousekeeper-bulk-delete"
+
+SCRIPT = """
+import groovy.json.JsonOutput
+import groovy.json.JsonSlurper
+import org.sonatype.nexus.common.entity.DetachedEntityId
+import org.sonatype.nexus.repository.storage.StorageFacet
+
+def request = new JsonSlurper().parseText(args)
+def repo = repository.repositoryManager.get(request.repository)
+def tx = repo.facet(StorageFacet).txSupplier().get()
+def deleted = []
+try {
+    tx.begin()
+    request.ids.each { id ->
+        def padded = id + '=' * ((4 - id.length() % 4) % 4)
+        def entityId = new String(Base64.getUrlDecoder().decode(padded)).split(':')[1]
+        def component = tx.findComponent(new DetachedEntityId(entityId))
+        if (component != null) {
+            tx.deleteComponent(component)
+            deleted << id
+        }
+    }
+    tx.commit()
+} finally {
+    tx.close()
+}
+return JsonOutput.toJson(deleted)
+"""
+
+
+class DeleteReport:
+    """
+    Running totals of a deletion
+    """
+
+    def __init__(self):
+        self.deleted = 0
+        self.bytes_freed = 0
+        self.bytes_reclaimed = 0  # bytes_freed without duplicate blobs, see space.SpaceAccount
+        self.space = None
+        self.server_side = 0
+        self.failures = {}
+        self.start = time.monotonic()
+
+    def add(self, comp_size: int, server_side=False) -> None:
+        self.deleted += 1
+        self.bytes_freed += comp_size
+        if server_side:
+            self.server_side += 1
+
+    @property
+    def rate(self) -> float:
+        """
+        :return: deleted components per second
+        """
+        elapsed = time.monotonic() - self.start
+        return self.deleted / elapsed if elapsed > 0 else 0.0
+
+
+class BulkDeleter:
+    """
+    Delete components, server side by chunks when possible, one by one otherwise.
+
+    Components are given one at a time with add(), flush() must be awaited once all of them have been given.
+
+    :param engine: HttpEngine sending the requests
+    :param nexus_url: base path of the nexus api
+    :param repository: repository holding the components
+    :param use_script: try the script api before falling back to client side deletion
+    :param chunk_size: number of components deleted by one script run
+    :param rate: maximum number of client side deletions per second, None for no limit
+    :param on_deleted: called with the component id after each deletion
+    :param on_failed: called with the component id and the error when a deletion fails
+    """
+
+    def __init__(self, engine, nexus_url, repository, use_script=False, chunk_size=500, rate=None,
+                 on_deleted=None, on_failed=None):
+        self.engine = engine
+        self.nexus_url = nexus_url
+        self.repository = repository
+        self.use_script = use_script
+        self.chunk_size = chunk_size
+        self.limiter = RateLimiter(rate)
+        self.on_deleted = on_deleted
+        self.on_failed = on_failed
+        self.failures = {}  # {id: (component, size)}
+        self.report = DeleteReport()
+        self._script_ready = None
+        self._chunk = []
+
+    async def add(self, component: dict, comp_size=0) -> None:
+        """
+        Delete a component, or queue it for the next script run
+        """
+        if self.use_script and await self._prepare_script():
+            self._chunk.append((component, comp_size))
+            if len(self._chunk) >= self.chunk_size:
+                chunk, self._chunk = self._chunk, []
+                await self._run_script(chunk)
+        else:
+            await self._delete(component, comp_size)
+
+    async def flush(self) -> None:
+        """
+        Delete the components still queued
+        """
+        if self._chunk:
+            chunk, self._chunk = self._chunk, []
+            await self._run_script(chunk)
+
+    async def retry_failures(self, rounds=3) -> dict:
+        """
+        Try again to delete the components whose deletion failed
+        :param rounds: maximum number of attempts for each failed component
+        :return: the components still failing as {id: (component, size)}
+        """
+        for _ in range(rounds):
+            if not self.failures:
+                break
+            await asyncio.gather(*[self._delete(component, comp_size)
+                                   for component, comp_size in list(self.failures.values())])
+        return self.failures
+
+    async def _delete(self, component: dict, comp_size: int) -> None:
+        component_id = component['id']
+        await self.limiter.acquire()
+        try:
+            response = await self.engine.arequest('DELETE', self.nexus_url + "v1/components/" + component_id)
+            # 404: already deleted, by a previous interrupted run for instance
+            if response.status_code != 404:
+                response.raise_for_status()
+        except requests.RequestException as e:
+            self.failures[component_id] = (component, comp_size)
+            if self.on_failed is not None:
+                self.on_failed(component_id, e)
+            return
+        self._deleted(component_id, comp_size)
+
+    def _deleted(self, component_id: str, comp_size: int, server_side=False) -> None:
+        self.failures.pop(component_id, None)
+        self.report.add(comp_size, server_side)
+        if self.on_deleted is not None:
+            self.on_deleted(component_id)
+
+    async def _prepare_script(self) -> bool:
+        """
+        Check that the script api is enabled and upload the deletion script, only once
+        :return: True if the script can be run
+        """
+        if self._script_ready is None:
+            self._script_ready = asyncio.ensure_future(self._upload_script())
+        return await self._script_ready
+
+    async def _upload_script(self) -> bool:
+        body = {'name': SCRIPT_NAME, 'type': 'groovy', 'content': SCRIPT}
+        try:
+            response = await self.engine.arequest('GET', self.nexus_url + "v1/script/" + SCRIPT_NAME)
+            if response.status_code == 200:
+                response = await self.engine.arequest('PUT', self.nexus_url + "v1/script/" + SCRIPT_NAME, json=body)
+            elif response.status_code == 404:
+                response = await self.engine.arequest('POST', self.nexus_url + "v1/script", json=body)
+            return response.ok
+        except requests.RequestException:
+            return False
+
+    async def _run_script(self, chunk: list) -> None:
+        sizes = {component['id']: comp_size for component, comp_size in chunk}
+        try:
+            response = await self.engine.arequest(
+                'POST', self.nexus_url + "v1/script/" + SCRIPT_NAME + "/run",
+                data=json.dumps({'repository': self.repository, 'ids': list(sizes)}),
+                headers={'Content-Type': 'text/plain'})
+            response.raise_for_status()
+            deleted = json.loads(response.json()['result'])
+        except (requests.RequestException, ValueError, KeyError):
+            # the script isn't usable on this server (datastore based nexus, missing privilege...)
+            self.use_script = False
+            await asyncio.gather(*[self._delete(component, comp_size) for component, comp_size in chunk])
+            return
+        # ids missing from the result were already gone
+        for component_id in deleted:
+            self._deleted(component_id, sizes.get(component_id, 0), server_side=True)
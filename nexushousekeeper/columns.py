@@ -0,0 +1,201 @@
+"""
+Columnar storage and group-by of component sizes, for the reports of large repositories.
+
+Components are appended to parallel typed arrays (``array.array``), strings being dictionary encoded once: a
+million components take a few MB instead of a dict per component. Totals per group, artifact, version, age bucket
+or artifact and version are computed in one pass over the code arrays, vectorised with numpy when it is installed.
+Reports only render the top N rows or one page, and exports are streamed row by row.
+"""
+import csv
+import datetime
+import heapq
+import json
+from array import array
+from functools import lru_cache
+
+from .formats import artifact_key
+from .grouping import COLUMNS
+from .mavenversion import parse_version
+from .policy import component_date
+
+AGE_BUCKETS = ((30, "< 30 days"), (90, "30-90 days"), (365, "90-365 days"), (None, "> 1 year"))
+UNKNOWN_AGE = "unknown"
+
+
+class _Dictionary:
+    """Encode strings as consecutive integer codes"""
+
+    def __init__(self, values=()):
+        self.codes = {}
+        self.values = []
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    :return: the numpy module, None if it isn't installed. Imported on first use so that importing this module
+             stays cheap for the CLI.
+    """
+    try:
+        import numpy
+    except ImportError:  # optional, speeds up the group-by
+        return None
+    return numpy
+
+
+def _age_bucket(date, now) -> str:
+    if date is None:
+        return UNKNOWN_AGE
+    days = (now - date).days
+    for limit, label in AGE_BUCKETS:
+        if limit is None or days < limit:
+            return label
+
+
+class ComponentColumns:
+    """
+    Components as columns of codes, plus their size
+
+    :param now: reference date of the age buckets, defaults to the current time
+    """
+
+    def __init__(self, now=None):
+        self.now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.dictionaries = {'group': _Dictionary(), 'artifact': _Dictionary(), 'version': _Dictionary(),
+                             'age': _Dictionary([label for _, label in AGE_BUCKETS] + [UNKNOWN_AGE])}
+        self.codes = {column: array('I') for column in COLUMNS}
+        self.sizes = array('q')
+        self._ages = {}  # {date: age bucket code}
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def append(self, component: dict, comp_size=None) -> None:
+        """
+        :param comp_size: size of the component in bytes, None when sizes aren't gathered
+        """
+        date = component_date(component)
+        age = self._ages.get(date)
+        if age is None:
+            age = self._ages[date] = self.dictionaries['age'].code(_age_bucket(date, self.now))
+        self.codes['group'].append(self.dictionaries['group'].code(component.get('group') or ""))
+        self.codes['artifact'].append(self.dictionaries['artifact'].code(artifact_key(component)))
+        self.codes['version'].append(self.dictionaries['version'].code(
+            parse_version(component['version']).base_version))
+        self.codes['age'].append(age)
+        self.sizes.append(comp_size or 0)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    def totals(self, by: str) -> list:
+        """
+        Group-by in one pass over the columns
+        :param by: one of grouping.GROUP_BY
+        :return: [(label, total size, number of components)], in order of first appearance
+        """
+        if by == 'artifact-version':
+            return self._pair_totals('artifact', 'version')
+        codes = self.codes[by]
+        values = self.dictionaries[by].values
+        numpy = _numpy()
+        if numpy is not None:
+            code_array = numpy.frombuffer(codes, dtype=numpy.uint32)
+            sizes = numpy.bincount(code_array, weights=numpy.frombuffer(self.sizes, dtype=numpy.int64),
+                                   minlength=len(values))
+            counts = numpy.bincount(code_array, minlength=len(values))
+            return [(values[code], int(sizes[code]), int(counts[code]))
+                    for code in range(len(values)) if counts[code]]
+        sizes = [0] * len(values)
+        counts = [0] * len(values)
+        for code, comp_size in zip(codes, self.sizes):
+            sizes[code] += comp_size
+            counts[code] += 1
+        return [(values[code], sizes[code], counts[code]) for code in range(len(values)) if counts[code]]
+
+    def _pair_totals(self, first: str, second: str) -> list:
+        """
+        :return: [("first:second", total size, number of components)] like totals
+        """
+        width = max(len(self.dictionaries[second]), 1)
+        first_values = self.dictionaries[first].values
+        second_values = self.dictionaries[second].values
+        numpy = _numpy()
+        if numpy is not None:
+            pairs = (numpy.frombuffer(self.codes[first], dtype=numpy.uint32).astype(numpy.int64) * width
+                     + numpy.frombuffer(self.codes[second], dtype=numpy.uint32))
+            keys, first_index, inverse = numpy.unique(pairs, return_index=True, return_inverse=True)
+            sizes = numpy.bincount(inverse, weights=numpy.frombuffer(self.sizes, dtype=numpy.int64))
+            counts = numpy.bincount(inverse)
+            order = numpy.argsort(first_index, kind='stable')
+            return [(first_values[int(keys[i]) // width] + ":" + second_values[int(keys[i]) % width],
+                     int(sizes[i]), int(counts[i])) for i in order]
+        totals = {}
+        for first_code, second_code, comp_size in zip(self.codes[first], self.codes[second], self.sizes):
+            total = totals.get(first_code * width + second_code)
+            if total is None:
+                totals[first_code * width + second_code] = [comp_size, 1]
+            else:
+                total[0] += comp_size
+                total[1] += 1
+        return [(first_values[key // width] + ":" + second_values[key % width], total[0], total[1])
+                for key, total in totals.items()]
+
+    def nested(self, first: str, second: str) -> dict:
+        """
+        :return: {first: {second: total size}}, e.g. sizes by artifact then version
+        """
+        first_values = self.dictionaries[first].values
+        second_values = self.dictionaries[second].values
+        nested = {}
+        for first_code, second_code, comp_size in zip(self.codes[first], self.codes[second], self.sizes):
+            by_second = nested.setdefault(first_values[first_code], {})
+            second_value = second_values[second_code]
+            by_second[second_value] = by_second.get(second_value, 0) + comp_size
+        return nested
+
+    def top(self, by: str, count: int) -> list:
+        """
+        :return: the count largest rows of totals(by), by size then number of components
+        """
+        return heapq.nlargest(count, self.totals(by), key=lambda row: (row[1], row[2]))
+
+    def page(self, by: str, page: int, page_size: int) -> list:
+        """
+        :param page: page number, starting at 1
+        :return: one page of totals(by), sorted by decreasing size
+        """
+        rows = sorted(self.totals(by), key=lambda row: (row[1], row[2]), reverse=True)
+        return rows[(page - 1) * page_size:page * page_size]
+
+    def export(self, path: str, by: str) -> int:
+        """
+        Write totals(by) to a .csv or .json file, one row at a time
+        :return: the number of rows written
+        """
+        rows = self.totals(by)
+        with open(path, 'w', encoding="utf-8", newline='') as export_file:
+            if path.lower().endswith('.json'):
+                export_file.write("[")
+                for i, (label, comp_size, count) in enumerate(rows):
+                    export_file.write(("," if i else "") + "\n" + json.dumps(
+                        {by: label, 'size': comp_size, 'components': count}))
+                export_file.write("\n]\n")
+            else:
+                writer = csv.writer(export_file)
+                writer.writerow((by, 'size', 'components'))
+                writer.writerows(rows)
+        return len(rows)
@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+import time
+from .mavenversion import parse_version
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    id TEXT PRIMARY KEY,
+    repository TEXT NOT NULL,
+    grp TEXT,
+    name TEXT,
+    version TEXT,
+    base_version TEXT,
+    refresh INTEGER
+);
+CREATE INDEX IF NOT EXISTS components_repository ON components (repository, grp, name);
+CREATE TABLE IF NOT EXISTS assets (
+    id TEXT PRIMARY KEY,
+    component_id TEXT NOT NULL,
+    path TEXT,
+    download_url TEXT,
+    file_size INTEGER,
+    sha1 TEXT,
+    blob_store TEXT,
+    last_modified TEXT,
+    blob_created TEXT
+);
+CREATE INDEX IF NOT EXISTS assets_component ON assets (component_id);
+CREATE TABLE IF NOT EXISTS refreshes (
+    repository TEXT PRIMARY KEY,
+    refresh INTEGER,
+    refreshed_at REAL
+);
+"""
+
+
+class ComponentIndex:
+    """
+    On-disk index of nexus components and assets, kept in a SQLite database.
+
+    A refresh still walks the nexus listing (the api has no change feed) but only writes the components whose
+    assets changed, compared by ``lastModified``/``blobCreated``, and forgets the ones which disappeared. Sizes
+    resolved with HEAD requests are stored too, so unchanged assets are never sized again. Every command can then
+    run against the index without any request to the server.
+
+    :param path: database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def refreshed_at(self, repository: str):
+        """
+        :return: timestamp of the last complete refresh of the repository or None if never refreshed
+        """
+        row = self._connection.execute("SELECT refreshed_at FROM refreshes WHERE repository = ?",
+                                       (repository,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, repository: str, pages, complete=True):
+        """
+        Update the index from a nexus listing, page by page
+        :param repository: repository the listing comes from
+        :param pages: iterable of component lists, as returned by the nexus listing
+        :param complete: True if pages cover the whole repository, components not seen are then removed
+        :return: a generator of the same pages where assets without fileSize get the size already known
+        """
+        # every refresh, partial ones included, takes the next number: a component stamped by a search can't be
+        # mistaken for one seen by the next complete refresh
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT refresh, refreshed_at FROM refreshes WHERE repository = ?",
+                                           (repository,)).fetchone()
+            refresh = (row[0] if row else 0) + 1
+            self._connection.execute("INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)",
+                                     (repository, refresh, row[1] if row else None))
+        for page in pages:
+            self._merge_page(repository, page, refresh)
+            yield page
+        if complete:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "DELETE FROM assets WHERE component_id IN "
+                    "(SELECT id FROM components WHERE repository = ? AND refresh < ?)", (repository, refresh))
+                self._connection.execute("DELETE FROM components WHERE repository = ? AND refresh < ?",
+                                         (repository, refresh))
+                self._connection.execute("INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)",
+                                         (repository, refresh, time.time()))
+
+    def _merge_page(self, repository: str, page: list, refresh: int) -> None:
+        ids = [component['id'] for component in page]
+        if not ids:
+            return
+        with self._lock, self._connection:
+            known = {}
+            known_count = {}
+            for row in self._connection.execute(
+                    "SELECT id, component_id, file_size, last_modified, blob_created FROM assets "
+                    "WHERE component_id IN (%s)" % ",".join("?" * len(ids)), ids):
+                known[row['id']] = row
+                known_count[row['component_id']] = known_count.get(row['component_id'], 0) + 1
+            changed = []
+            for component in page:
+                assets = component.get('assets', ())
+                unchanged = component['id'] in known_count and known_count[component['id']] == len(assets)
+                for asset in assets:
+                    row = known.get(asset['id'])
+                    if row is None or row['last_modified'] != asset.get('lastModified') \
+                            or row['blob_created'] != asset.get('blobCreated'):
+                        unchanged = False
+                    elif asset.get('fileSize') is None and row['file_size'] is not None:
+                        asset['fileSize'] = row['file_size']
+                if not unchanged:
+                    changed.append(component)
+            self._connection.execute(
+                "UPDATE components SET refresh = ? WHERE id IN (%s)" % ",".join("?" * len(ids)), [refresh] + ids)
+            for component in changed:
+                self._write_component(repository, component, refresh)
+
+    def _write_component(self, repository: str, component: dict, refresh: int) -> None:
+        self._connection.execute("INSERT OR REPLACE INTO components VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (component['id'], repository, component.get('group'), component['name'],
+                                  component['version'], parse_version(component['version']).base_version, refresh))
+        self._connection.execute("DELETE FROM assets WHERE component_id = ?", (component['id'],))
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(asset['id'], component['id'], asset.get('path'), asset.get('downloadUrl'), asset.get('fileSize'),
+              (asset.get('checksum') or {}).get('sha1'), asset.get('blobStoreName'), asset.get('lastModified'),
+              asset.get('blobCreated')) for asset in component.get('assets', ())])
+
+    def store_sizes(self, component: dict) -> None:
+        """
+        Remember the sizes resolved for the assets of a component
+        """
+        sizes = [(asset['fileSize'], asset['id']) for asset in component.get('assets', ())
+                 if asset.get('fileSize') is not None and 'id' in asset]
+        with self._lock, self._connection:
+            self._connection.executemany("UPDATE assets SET file_size = ? WHERE id = ?", sizes)
+
+    def remove(self, component_id: str) -> None:
+        """
+        Forget a deleted component
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM assets WHERE component_id = ?", (component_id,))
+            self._connection.execute("DELETE FROM components WHERE id = ?", (component_id,))
+
+    def iter_component_pages(self, repository: str, page_size=100, name=None, group=None, version=None,
+                             version_glob=None):
+        """
+        List the indexed components like the nexus api does, page by page
+        :param name: artifact id filter
+        :param group: group id filter, or glob pattern
+        :param version: base version filter, like maven.baseVersion
+        :param version_glob: version glob pattern (* and ?), like a nexus version wildcard
+        :return: a generator of component lists
+        """
+        query = "SELECT id, grp, name, version FROM components WHERE repository = ? AND id > ?"
+        params = [repository]
+        for column, value in (('name', name), ('grp', group), ('base_version', version), ('version', version_glob)):
+            if value:
+                operator = "GLOB" if column == 'version' or set('*?[') & set(value) else "="
+                query += " AND %s %s ?" % (column, operator)
+                params.append(value)
+        query += " ORDER BY id LIMIT %d" % page_size
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._connection.execute(query, params[:1] + [last_id] + params[1:]).fetchall()
+                if not rows:
+                    break
+                assets = {}
+                for row in self._connection.execute(
+                        "SELECT * FROM assets WHERE component_id IN (%s)" % ",".join("?" * len(rows)),
+                        [row['id'] for row in rows]):
+                    assets.setdefault(row['component_id'], []).append(
+                        {'id': row['id'], 'path': row['path'], 'downloadUrl': row['download_url'],
+                         'fileSize': row['file_size'], 'checksum': {'sha1': row['sha1']},
+                         'blobStoreName': row['blob_store'], 'lastModified': row['last_modified'],
+                         'blobCreated': row['blob_created']})
+            yield [{'name': row['name'], 'version': row['version'], 'id': row['id'], 'group': row['grp'],
+                    'assets': assets.get(row['id'], [])} for row in rows]
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1]['id']
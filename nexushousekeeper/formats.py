@@ -0,0 +1,85 @@
+"""
+Repository formats: how components of each nexus format are searched and identified.
+
+Nexus lists every format through the same ``v1/components`` and ``v1/search`` endpoints, only the search keys and
+the meaning of group, name and version change.
+"""
+
+
+class RepositoryFormat:
+    """
+    Search keys of a nexus format, None when the format has no such key
+
+    :ivar name: nexus format name
+    :ivar group_key: search parameter of the group (maven groupId, npm scope, raw directory)
+    :ivar name_key: search parameter of the artifact name
+    :ivar version_key: search parameter of the version
+    """
+    name = None
+    group_key = 'group'
+    name_key = 'name'
+    version_key = 'version'
+
+    def search_params(self, name=None, group=None, version=None, version_glob=None) -> dict:
+        """
+        :param version_glob: nexus wildcard (* and ?) on the version, searched with the generic version key since the
+                             base version of maven can't be searched with wildcards
+        :return: v1/search parameters selecting the given name, group and version
+        """
+        params = {}
+        for key, value in ((self.name_key, name), (self.group_key, group), (self.version_key, version),
+                           (self.version_key and 'version', version_glob)):
+            if value:
+                if key is None:
+                    raise ValueError("%s repositories can't be searched by this criteria" % self.name)
+                params[key] = value
+        return params
+
+
+class Maven2Format(RepositoryFormat):
+    name = 'maven2'
+    group_key = 'maven.groupId'
+    name_key = 'maven.artifactId'
+    version_key = 'maven.baseVersion'
+
+
+class NpmFormat(RepositoryFormat):
+    name = 'npm'
+    group_key = 'npm.scope'
+
+
+class DockerFormat(RepositoryFormat):
+    name = 'docker'
+    group_key = None
+    name_key = 'docker.imageName'
+    version_key = 'docker.imageTag'
+
+
+class RawFormat(RepositoryFormat):
+    name = 'raw'
+    group_key = 'group'
+    version_key = None
+
+
+FORMATS = {repository_format.name: repository_format() for repository_format in
+           (Maven2Format, NpmFormat, DockerFormat, RawFormat)}
+
+
+def get_format(name: str) -> RepositoryFormat:
+    """
+    :param name: nexus format name, formats without specific search keys use the generic ones
+    """
+    if name in FORMATS:
+        return FORMATS[name]
+    generic = RepositoryFormat()
+    generic.name = name
+    return generic
+
+
+def artifact_key(component: dict) -> str:
+    """
+    :return: group:name, or name alone for formats without group (docker, unscoped npm packages)
+    """
+    if component.get('group'):
+        return component['group'] + ":" + component['name']
+    return component['name']
@@ -0,0 +1,9 @@
+"""
+Names of the columns the component sizes can be grouped by.
+
+Kept apart from columns, which loads the version parsing and the policy, so the command line can offer them as
+choices without importing anything else.
+"""
+
+COLUMNS = ('group', 'artifact', 'version', 'age')
+GROUP_BY = COLUMNS + ('artifact-version',)
@@ -0,0 +1,303 @@
+import asyncio
+import collections
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpEngine:
+    """
+    HTTP layer shared by listing, sizing and deletion.
+
+    Every request goes through one keep-alive ``requests.Session`` whose pool is sized to the global concurrency
+    limit. Coroutines await requests run on a single bounded executor, so no more than ``concurrency`` requests
+    are in flight at once and no more than ``per_host`` of them target the same host, whatever the number of
+    coroutines waiting.
+
+    Requests answered with 429 or a 5xx status, or failing to connect, are retried with an exponential backoff,
+    honouring ``Retry-After`` when the server sends it. ``throttled`` counts the 429 and 503 answers.
+
+    :param auth: authentication attached to every request
+    :param concurrency: global limit of requests in flight
+    :param per_host: limit of requests in flight per host, defaults to concurrency
+    :param retries: number of retries of a failed request
+    :param backoff: delay in seconds before the first retry, doubled on each attempt
+    :param timeout: seconds to wait for the connection and then for each read, a (connect, read) tuple or a single
+        value for both. A request timing out is retried like a failed connection
+    :param metrics: optional metrics.Metrics recording every request
+    """
+
+    def __init__(self, auth=None, concurrency=20, per_host=None, retries=0, backoff=0.5, metrics=None,
+                 timeout=(10, 60)):
+        self.concurrency = concurrency
+        self.per_host = per_host or concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.retried = 0
+        self.throttled = 0
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.auth = auth
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="nexushousekeeper-http")
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        with self._host_semaphore(url):
+            if self.metrics is None:
+                return self.session.request(method, url, **kwargs)
+            self.metrics.request_started()
+            start = time.monotonic()
+            status = "error"
+            try:
+                response = self.session.request(method, url, **kwargs)
+                status = response.status_code
+                return response
+            except requests.RequestException as e:
+                status = type(e).__name__
+                raise
+            finally:
+                self.metrics.request_done(method, url, status, time.monotonic() - start)
+
+    def _retry_delay(self, attempt: int, response=None, error=None):
+        """
+        :return: seconds to wait before retrying, None if the request must not be retried
+        """
+        if response is not None and response.status_code in (429, 503):
+            self.throttled += 1
+        if attempt >= self.retries:
+            return None
+        if response is not None and response.status_code != 429 and response.status_code < 500:
+            return None
+        if error is not None and not isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return None
+        self.retried += 1
+        if self.metrics is not None:
+            self.metrics.inc("retries_total")
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request from the calling thread, waiting for a free slot on the target host
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, **kwargs)
+            except requests.RequestException as e:
+                delay = self._retry_delay(attempt, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def arequest(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request on the engine executor without blocking the event loop, the backoff between retries
+        doesn't hold an executor thread
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                response = await loop.run_in_executor(self.executor, partial(self._send, method, url, **kwargs))
+            except requests.RequestException as e:
+                delay = self._retry_delay(attempt, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+async def aiterate(iterable, chunk_size=100):
+    """
+    Iterate any iterable from a coroutine. Async iterables are consumed on the loop, lists as they are, other
+    iterables lazily by chunks in the default executor since pulling from them may block on a paginated nexus
+    listing.
+    """
+    if hasattr(iterable, '__aiter__'):
+        async for item in iterable:
+            yield item
+        return
+    if isinstance(iterable, (list, tuple)):
+        for item in iterable:
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    while True:
+        chunk = await loop.run_in_executor(None, _take, iterator, chunk_size)
+        if not chunk:
+            return
+        for item in chunk:
+            yield item
+
+
+_NO_MORE_WORK = object()
+
+
+async def run_bounded(iterable, fun, limit: int) -> int:
+    """
+    Await fun(item) for every item of iterable with limit workers fed by a bounded work queue, all on the running
+    event loop. A worker takes the next item as soon as it is done, so one slow item never holds back the others.
+
+    After an error, the items left are not handled anymore and the first error is raised once the running ones
+    are done.
+    :param iterable: items to handle, any iterable or async iterable, see aiterate
+    :param fun: coroutine function called for each item
+    :param limit: number of workers
+    :return: the number of items queued
+    """
+    work = asyncio.Queue(maxsize=limit)
+    errors = []
+    handled = 0
+
+    async def worker():
+        while True:
+            item = await work.get()
+            if item is _NO_MORE_WORK:
+                return
+            if not errors:
+                try:
+                    await fun(item)
+                except Exception as e:
+                    errors.append(e)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(limit)]
+    try:
+        async for item in aiterate(iterable, limit):
+            if errors:
+                break
+            await work.put(item)
+            handled += 1
+        for _ in workers:
+            await work.put(_NO_MORE_WORK)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    if errors:
+        raise errors[0]
+    return handled
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of an operation, shared by the coroutines of one event loop
+
+    :param rate: operations per second, None or 0 for no limit
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        if not self.rate:
+            return
+        now = time.monotonic()
+        slot = max(self._next, now)
+        self._next = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted like TCP congestion control (AIMD), shared by the coroutines of one event loop
+
+    The limit grows by one after a window of ``limit`` requests completed without congestion and is halved when a
+    request is throttled or its latency exceeds ``latency_factor`` times the lowest latency seen (plus
+    ``tolerance`` seconds, so jitter on a fast network isn't taken for congestion). The limit decreases at most once
+    per window: the requests already in flight when it was halved don't halve it again.
+
+    :param initial: starting limit
+    :param minimum: lowest limit
+    :param maximum: highest limit
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=20, latency_factor=3.0, tolerance=0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(initial, maximum))
+        self.latency_factor = latency_factor
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.decreases = 0
+        self._waiters = collections.deque()
+        self._completed = 0
+        self._acked = 0
+        self._recovery = 0
+        self._base_latency = None
+
+    async def acquire(self) -> None:
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        self.in_flight += 1
+
+    def release(self, latency: float, congested=False) -> None:
+        """
+        :param latency: duration of the request in seconds
+        :param congested: True if the request was throttled by the server
+        """
+        self.in_flight -= 1
+        self._completed += 1
+        if self._base_latency is None or latency < self._base_latency:
+            self._base_latency = latency
+        if congested or latency > self._base_latency * self.latency_factor + self.tolerance:
+            self._acked = 0
+            if self._completed >= self._recovery:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._recovery = self._completed + self.in_flight + 1
+                self.decreases += 1
+        else:
+            self._acked += 1
+            if self._acked >= self.limit:
+                self._acked = 0
+                self.limit = min(self.maximum, self.limit + 1)
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+def _take(iterator, n: int) -> list:
+    return list(islice(iterator, n))
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+
+
+class DeletionJournal:
+    """
+    Append-only journal of a deletion run, one json record per line:
+
+    * ``{"op": "plan", "id": ..., "group": ..., "name": ..., "version": ..., "size": ...}`` as soon as the
+      component is planned, the size being null until it is known, then recorded again with it
+    * ``{"op": "done", "id": ...}`` once the component is deleted
+    * ``{"op": "fail", "id": ..., "error": ...}`` when a deletion failed
+
+    Records are fsynced by batches, every sync_every records or sync_interval seconds, so an interrupted run loses
+    at most one batch of records: deleting again a component already gone is harmless.
+
+    :param path: journal file, appended to if it exists
+    """
+
+    def __init__(self, path: str, sync_every=100, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # ids deleted by the previous runs, planned again when they are still listed, from a stale index
+        planned, self.done, _ = self.load(path) if os.path.exists(path) else ([], set(), {})
+        self._planned = {component['id']: component['size'] for component in planned}
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._synced_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> tuple:
+        """
+        Read a journal
+        :return: (planned components, deleted ids, {failed id: last error}), planned components being dicts
+                 with id, repository, group, name, version and size
+        """
+        planned = {}
+        deleted = set()
+        failed = {}
+        with open(path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # last line cut by the interruption
+                    continue
+                if record['op'] == 'plan':
+                    planned[record['id']] = {key: record.get(key) for key in ('id', 'repository', 'group', 'name',
+                                                                              'version', 'size')}
+                elif record['op'] == 'done':
+                    deleted.add(record['id'])
+                    failed.pop(record['id'], None)
+                elif record['op'] == 'fail':
+                    failed[record['id']] = record['error']
+        return list(planned.values()), deleted, failed
+
+    @classmethod
+    def remaining(cls, path: str) -> list:
+        """
+        :return: the planned components not deleted yet, failed ones included
+        """
+        planned, deleted, _ = cls.load(path)
+        return [component for component in planned if component['id'] not in deleted]
+
+    def planned(self, component: dict, comp_size=None) -> None:
+        """
+        :param comp_size: size of the component, None if it isn't known yet
+        """
+        if component['id'] in self._planned and (comp_size is None or self._planned[component['id']] is not None):
+            return
+        self._planned[component['id']] = comp_size
+        self._write({'op': 'plan', 'id': component['id'], 'repository': component.get('repository'),
+                     'group': component.get('group'),
+                     'name': component['name'], 'version': component['version'], 'size': comp_size})
+
+    def deleted(self, component_id: str) -> None:
+        self._write({'op': 'done', 'id': component_id})
+
+    def failed(self, component_id: str, error) -> None:
+        self._write({'op': 'fail', 'id': component_id, 'error': str(error)})
+
+    def _write(self, record: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._pending += 1
+            if self._pending >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced_at = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
@@ -0,0 +1,201 @@
+"""
+Maven version parsing, following the ordering of ``org.apache.maven.artifact.versioning.ComparableVersion``.
+
+Each version string is parsed once into a MavenVersion holding a tuple sort key, so sorting and comparing
+versions only compares tuples: ``2.9 < 2.10``, ``1.0-alpha < 1.0-rc1 < 1.0-SNAPSHOT < 1.0 < 1.0-sp1`` and the
+timestamped builds of a snapshot sort by timestamp then build number.
+"""
+import datetime
+import re
+from functools import lru_cache
+
+_TIMESTAMPED = re.compile(r"^(.*)-(\d{8}\.\d{6})-?(\d*)$")
+_NUMERIC = re.compile(r"^\d+(?:\.\d+)*$")
+_TOKENS = re.compile(r"(\d+)|([^\d.-]+)|(.)")
+_SHORT_VERSION = re.compile(r"(\d*\.?\d*\.?\d*)")
+
+_QUALIFIERS = ("alpha", "beta", "milestone", "rc", "snapshot", "", "sp")
+_ALIASES = {"ga": "", "final": "", "release": "", "cr": "rc"}
+_RELEASE_INDEX = _QUALIFIERS.index("")
+_ONE_LETTER = {"a": "alpha", "b": "beta", "m": "milestone"}
+
+# Every item is encoded with the same 4 fields: (comparison with an absent item, type rank, number, text), type
+# ranks being string < list < int as in ComparableVersion. A list item is followed by its own items then by
+# _END, which compares like an absent item. Lists are flattened, so a key is a flat tuple of ints and strings
+# whose comparison runs entirely in C, and two keys always diverge on fields of the same type.
+# ComparableVersion is not transitive around zeros (0 == absent < "sp" < 0): ints always rank above an absent
+# item here, which keeps 1.0-sp < 1.0.1 like maven does.
+_STRING, _LIST, _INT = 0, 1, 2
+_END = (0, -1, 0, "")
+_ZERO = (1, _INT, 0, "")
+
+
+@lru_cache(maxsize=1024)
+def _string_item(value: str, followed_by_digit: bool) -> tuple:
+    if followed_by_digit and len(value) == 1:
+        value = _ONE_LETTER.get(value, value)
+    value = _ALIASES.get(value, value)
+    if value in _QUALIFIERS:
+        index, text = _QUALIFIERS.index(value), ""
+    else:
+        # unknown qualifiers come after the known ones, in alphabetical order
+        index, text = len(_QUALIFIERS), value
+    return ((index > _RELEASE_INDEX) - (index < _RELEASE_INDEX), _STRING, index, text)
+
+
+def _is_null(item: tuple) -> bool:
+    if item[1] == _INT:
+        return item[2] == 0
+    if item[1] == _STRING:
+        return item[0] == 0
+    return not item[2]
+
+
+def _close(items: list) -> tuple:
+    """Normalize a list like ComparableVersion.ListItem.normalize"""
+    for i in range(len(items) - 1, -1, -1):
+        if _is_null(items[i]):
+            del items[i]
+        elif items[i][1] != _LIST:
+            break
+    return (items[0][0] if items else 0, _LIST, items)
+
+
+def _flatten(items: list, out: list) -> list:
+    for item in items:
+        if item[1] == _LIST:
+            out += (item[0], _LIST, 0, "")
+            _flatten(item[2], out)
+        else:
+            out += item
+    out += _END
+    return out
+
+
+@lru_cache(maxsize=1 << 16)
+def comparable_key(version: str) -> tuple:
+    """
+    :param version: any version string
+    :return: a flat tuple ordered like maven ComparableVersion
+    """
+    version = version.lower()
+    if _NUMERIC.match(version):
+        items = [int(digits) for digits in version.split('.')]
+        while items and items[-1] == 0:
+            items.pop()
+        key = []
+        for number in items:
+            key += (1, _INT, number, "")
+        return tuple(key) + _END
+
+    stack = [[]]
+    current = stack[0]
+    previous = None  # kind of the previous token, None after a separator
+    after_dot = False
+    last_string = None
+    for digits, string, separator in _TOKENS.findall(version):
+        if separator:
+            if previous is None:
+                current.append(_ZERO)
+            previous = None
+            after_dot = separator == '.'
+            if separator == '-':
+                current = []
+                stack.append(current)
+        elif digits:
+            if previous == _STRING:
+                # a transition from letters to digits starts a sub list, "a1" is alpha-1
+                current[-1] = _string_item(last_string, True)
+                current = []
+                stack.append(current)
+            current.append((1, _INT, int(digits), ""))
+            previous = _INT
+        else:
+            if previous == _INT or (previous is None and after_dot):
+                # a qualifier after a dot starts a sub list like after a hyphen: 2.0.a == 2-a < 2-1 < 2.0.2
+                current = []
+                stack.append(current)
+            last_string = string
+            current.append(_string_item(string, False))
+            previous = _STRING
+
+    while len(stack) > 1:
+        closed = _close(stack.pop())
+        stack[-1].append(closed)
+    return tuple(_flatten(_close(stack[0])[2], []))
+
+
+class MavenVersion:
+    """
+    A parsed component version, comparable and hashable through its sort key
+
+    :ivar version: the version as listed by nexus
+    :ivar base_version: X-SNAPSHOT for a timestamped snapshot build, the version otherwise
+    :ivar short_version: leading numeric part, e.g. 2.1.1 for 2.1.1-20201208.134457-2
+    :ivar timestamp: snapshot build timestamp as yyyyMMdd.HHmmss, None for other versions
+    :ivar build: snapshot build number, 0 for other versions
+    """
+    __slots__ = ('version', 'base_version', 'short_version', 'timestamp', 'build', 'key')
+
+    def __init__(self, version: str):
+        self.version = version
+        match = _TIMESTAMPED.match(version)
+        if match:
+            self.base_version = match.group(1) + "-SNAPSHOT"
+            self.timestamp = match.group(2)
+            self.build = int(match.group(3) or 0)
+        else:
+            self.base_version = version
+            self.timestamp = None
+            self.build = 0
+        self.short_version = _SHORT_VERSION.match(version).group(1)
+        self.key = comparable_key(self.base_version) + (self.timestamp or "", self.build)
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.base_version.endswith("-SNAPSHOT")
+
+    @property
+    def date(self):
+        """
+        :return: the snapshot build date or None
+        """
+        if self.timestamp is None:
+            return None
+        return datetime.datetime.strptime(self.timestamp, '%Y%m%d.%H%M%S')
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __le__(self, other):
+        return self.key <= other.key
+
+    def __gt__(self, other):
+        return self.key > other.key
+
+    def __ge__(self, other):
+        return self.key >= other.key
+
+    def __eq__(self, other):
+        return isinstance(other, MavenVersion) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return "MavenVersion(%r)" % self.version
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_version(version: str) -> MavenVersion:
+    """
+    Parse a version string, the parsed versions of the most used strings are cached
+    """
+    return MavenVersion(version)
+
+
+def sort_key(version: str) -> tuple:
+    """
+    :return: the sort key of a version string, to be used as ``key`` of sorted, heapq, ...
+    """
+    return parse_version(version).key
@@ -0,0 +1,186 @@
+"""
+Run metrics: request counts, latencies, in-flight requests, retries and bytes freed.
+
+Metrics are recorded by the HTTP engine (every request, by endpoint and status), the listing (one observation per
+page), the size resolution (one per component), the policy evaluation and the deletion. They are exported as a
+Prometheus textfile, to be picked by the node exporter textfile collector, and as a JSON run summary.
+"""
+import json
+import os
+import threading
+import time
+
+PREFIX = "nexushousekeeper_"
+
+# upper bounds in seconds of the latency histograms buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+def endpoint_of(url: str) -> str:
+    """
+    :return: the api endpoint of an url without ids (v1/components, v1/script/run...), "asset" for downloads
+    """
+    marker = "/service/rest/"
+    if marker not in url:
+        return "asset"
+    parts = url.split(marker, 1)[1].split("?", 1)[0].split("/")
+    endpoint = "/".join(parts[:2])
+    if parts[-1] == "run":
+        endpoint += "/run"
+    return endpoint
+
+
+class Histogram:
+    """Cumulative buckets, count, sum and max of observations"""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """
+        :return: upper bound of the bucket holding the q quantile
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """
+    Thread safe registry of counters, gauges and histograms, identified by a name and sorted labels
+    """
+
+    def __init__(self):
+        self.start = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name,) + tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value=1, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value, **labels) -> None:
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def request_started(self) -> None:
+        with self._lock:
+            in_flight = self.gauges.get(("in_flight",), 0) + 1
+            self.gauges[("in_flight",)] = in_flight
+            self.gauges[("in_flight_max",)] = max(self.gauges.get(("in_flight_max",), 0), in_flight)
+
+    def request_done(self, method: str, url: str, status, seconds: float) -> None:
+        """
+        :param status: http status, or the exception name when no response was received
+        """
+        endpoint = endpoint_of(url)
+        with self._lock:
+            self.gauges[("in_flight",)] -= 1
+        self.inc("requests_total", method=method, endpoint=endpoint, status=str(status))
+        self.observe("request_seconds", seconds, endpoint=endpoint)
+
+    def counter(self, name: str, **labels):
+        return self.counters.get(self._key(name, labels), 0)
+
+    def write_textfile(self, path: str) -> None:
+        """
+        Write the metrics in the Prometheus text format, atomically so a collector never reads half a file
+        """
+        lines = []
+        with self._lock:
+            for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+                names = sorted({key[0] for key in values})
+                for name in names:
+                    metric = PREFIX + name
+                    lines.append("# TYPE %s %s" % (metric, kind))
+                    for key in sorted(k for k in values if k[0] == name):
+                        lines.append("%s%s %s" % (metric, _labels(key[1:]), _number(values[key])))
+            for name in sorted({key[0] for key in self.histograms}):
+                metric = PREFIX + name
+                lines.append("# TYPE %s histogram" % metric)
+                for key in sorted(k for k in self.histograms if k[0] == name):
+                    histogram = self.histograms[key]
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.buckets):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append("%s_bucket%s %d" % (metric, _labels(key[1:] + (("le", le),)), cumulative))
+                    lines.append("%s_sum%s %s" % (metric, _labels(key[1:]), _number(histogram.sum)))
+                    lines.append("%s_count%s %d" % (metric, _labels(key[1:]), histogram.count))
+        _write_atomically(path, "\n".join(lines) + "\n")
+
+    def summary(self) -> dict:
+        """
+        :return: the run summary: duration, requests by endpoint and status, latencies and totals
+        """
+        with self._lock:
+            requests = {}
+            others = {}
+            for key, value in self.counters.items():
+                labels = dict(key[1:])
+                if key[0] == "requests_total":
+                    by_status = requests.setdefault(labels['method'] + " " + labels['endpoint'], {})
+                    by_status[labels['status']] = value
+                else:
+                    others[key[0] + _labels(key[1:])] = value
+            latencies = {}
+            for key, histogram in self.histograms.items():
+                latencies[key[0] + _labels(key[1:])] = {
+                    'count': histogram.count, 'sum': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5), 'p95': histogram.quantile(0.95), 'max': round(histogram.max, 6)}
+            return {'duration_seconds': round(time.time() - self.start, 3), 'requests': requests,
+                    'latencies': latencies, 'counters': others,
+                    'gauges': {key[0] + _labels(key[1:]): value for key, value in self.gauges.items()}}
+
+    def write_summary(self, path: str) -> None:
+        _write_atomically(path, json.dumps(self.summary(), indent=2, sort_keys=True) + "\n")
+
+
+def _labels(items: tuple) -> str:
+    if not items:
+        return ""
+    return "{" + ",".join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for name, value in items) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _write_atomically(path: str, content: str) -> None:
+    temporary = path + ".tmp"
+    with open(temporary, 'w', encoding="utf-8") as output:
+        output.write(content)
+    os.replace(temporary, path)
@@ -0,0 +1,369 @@
+"""
+A local fake Nexus REST server, used by the tests and the benchmarks.
+
+It serves synthetic maven repositories through ``v1/components`` and ``v1/search`` (paginated with continuation
+tokens) and lists them on ``v1/repositories``. It answers HEAD and GET requests on asset download urls, deletes
+components and can emulate the script api used for bulk deletion. A share of the requests can be failed with 429/503
+to exercise retries. Every request is counted so benchmarks can report how many round trips an operation needs.
+
+Run it standalone with::
+
+    python -m nexushousekeeper.mocknexus --components 100000 --page-size 100 --latency 0.01
+"""
+import argparse
+import bisect
+import fnmatch
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+REST_PREFIX = "/service/rest/"
+
+
+def generate_components(count: int, assets_per_component: int = 3, asset_size: int = 1024,
+                        repository: str = "maven-repo", base_url: str = "", start: int = 0) -> list:
+    """
+    Build ``count`` synthetic maven components spread over 10 groups of 100 artifacts. Each artifact gets one
+    version per 1000 components, one version out of three being a timestamped snapshot.
+    :param start: number of the first component id, ids are unique across repositories
+    :return: components as returned by the nexus api
+    """
+    components = []
+    for i in range(count):
+        group = "org.example.g%d" % (i % 10)
+        name = "artifact%d" % (i // 10 % 100)
+        version = "1.%d.%d" % (i // 1000, i % 10)
+        if i // 1000 % 3 == 2:
+            version += "-202101%02d.%06d-%d" % (i // 1000 % 28 + 1, i % 235959, i // 1000 % 9 + 1)
+        assets = []
+        for j in range(assets_per_component):
+            path = "%s/%s/%s/%s-%s-%d.jar" % (group.replace('.', '/'), name, version, name, version, j)
+            digest = hashlib.sha1(path.encode()).hexdigest()
+            assets.append({'id': "a%d-%d" % (start + i, j), 'path': path, 'repository': repository, 'format': 'maven2',
+                           'downloadUrl': base_url + "/repository/" + repository + "/" + path,
+                           'checksum': {'sha1': digest, 'md5': digest[:32]}, 'blobStoreName': 'default',
+                           'fileSize': asset_size, 'lastModified': '2021-01-01T00:00:00.000+00:00',
+                           'blobCreated': '2021-01-01T00:00:00.000+00:00'})
+        components.append({'id': "c%d" % (start + i), 'repository': repository, 'format': 'maven2', 'group': group,
+                           'name': name, 'version': version, 'assets': assets})
+    return components
+
+
+class MockNexus:
+    """
+    Fake nexus server running in a background thread
+
+    :param components: number of synthetic components to serve in each repository
+    :param page_size: number of components per ``v1/components`` or ``v1/search`` page
+    :param with_file_size: if False, behave like Nexus < 3.30 and omit ``fileSize`` from assets
+    :param latency: delay in seconds added to every response
+    :param error_rate: share of the requests answered with 429 or 503
+    :param script_api: if True, accept scripts on ``v1/script`` and run them as a bulk deletion
+    :param repositories: names of the served repositories, defaults to [repository]
+    """
+
+    def __init__(self, components=1000, assets_per_component=3, asset_size=1024, page_size=10,
+                 with_file_size=True, latency=0.0, repository="maven-repo", error_rate=0.0, script_api=False,
+                 seed=42, port=0, repositories=None):
+        self.component_count = components
+        self.assets_per_component = assets_per_component
+        self.asset_size = asset_size
+        self.page_size = page_size
+        self.with_file_size = with_file_size
+        self.latency = latency
+        self.repositories = list(repositories) if repositories else [repository]
+        self.repository = self.repositories[0]
+        self.error_rate = error_rate
+        self.script_api = script_api
+        self.port = port
+        self.scripts = {}
+        self._random = random.Random(seed)
+        self.components = []
+        self._keys = []
+        self.assets_by_path = {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    @property
+    def rest_url(self) -> str:
+        """Base path of the api, as expected by ``--nexus-url``"""
+        return self.url + REST_PREFIX
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.counts.values())
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    def count(self, method: str, endpoint: str) -> None:
+        with self._lock:
+            self.counts[(method, endpoint)] += 1
+
+    def start(self) -> "MockNexus":
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.components = []
+        for i, repository in enumerate(self.repositories):
+            self.components += generate_components(self.component_count, self.assets_per_component,
+                                                   self.asset_size, repository, self.url, i * self.component_count)
+        self._keys = [_key(component['id']) for component in self.components]
+        for component in self.components:
+            for asset in component['assets']:
+                self.assets_by_path["/repository/" + component['repository'] + "/" + asset['path']] = asset
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def repository_list(self) -> list:
+        """
+        :return: the repositories as listed by ``v1/repositories``
+        """
+        return [{'name': repository, 'format': 'maven2', 'type': 'hosted',
+                 'url': self.url + "/repository/" + repository} for repository in self.repositories]
+
+    def delete(self, component_id: str) -> bool:
+        with self._lock:
+            i = bisect.bisect_left(self._keys, _key(component_id))
+            if i < len(self._keys) and self.components[i]['id'] == component_id:
+                del self.components[i]
+                del self._keys[i]
+                return True
+        return False
+
+    def page(self, token, repository=None, **filters) -> dict:
+        """
+        Like nexus, the continuation token points after the last returned component, so deleting components while
+        paginating doesn't skip any
+        :param filters: v1/search parameters (maven.groupId, maven.artifactId, maven.baseVersion, version), with
+                        wildcards except for maven.baseVersion
+        """
+        if repository is not None and len(self.repositories) > 1:
+            filters['repository'] = repository
+        with self._lock:
+            if token:
+                offset = bisect.bisect_right(self._keys, int(token))
+            elif 'repository' in filters and repository in self.repositories:
+                # the components of a repository are contiguous
+                offset = bisect.bisect_left(self._keys, self.repositories.index(repository) * self.component_count)
+            else:
+                offset = 0
+            if filters:
+                items = []
+                for component in self.components[offset:]:
+                    if _matches(component, filters):
+                        if len(items) == self.page_size:
+                            break
+                        items.append(component)
+                else:
+                    component = None
+                last = component is None
+            else:
+                items = self.components[offset:offset + self.page_size]
+                last = offset + self.page_size >= len(self.components)
+        if not self.with_file_size:
+            items = [dict(item, assets=[{k: v for k, v in asset.items() if k != 'fileSize'}
+                                        for asset in item['assets']]) for item in items]
+        return {'items': items, 'continuationToken': None if last else str(_key(items[-1]['id']))}
+
+
+def _key(component_id: str) -> int:
+    return int(component_id[1:])
+
+
+_SEARCH_FIELDS = {'maven.groupId': 'group', 'maven.artifactId': 'name', 'group': 'group', 'name': 'name',
+                  'repository': 'repository'}
+
+
+_TIMESTAMPED = re.compile(r"^(.*)-\d{8}\.\d{6}-?\d*$")
+
+
+def _base_version(version: str) -> str:
+    return _TIMESTAMPED.sub(r"\1-SNAPSHOT", version)
+
+
+def _matches(component: dict, filters: dict) -> bool:
+    for param, value in filters.items():
+        if param == 'maven.baseVersion':
+            if _base_version(component['version']) != value:
+                return False
+        elif param == 'version':
+            if not fnmatch.fnmatchcase(component['version'], value):
+                return False
+        elif param in _SEARCH_FIELDS and not fnmatch.fnmatchcase(component[_SEARCH_FIELDS[param]] or "", value):
+            return False
+    return True
+
+
+def _make_handler(nexus: MockNexus):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", content_type="application/json", length=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body) if length is None else length))
+            self.end_headers()
+            if self.command != "HEAD" and body:
+                self.wfile.write(body)
+
+        def _begin(self, method, endpoint) -> bool:
+            """Count the request, apply latency and error injection, return False if already answered"""
+            nexus.count(method, endpoint)
+            if nexus.latency:
+                time.sleep(nexus.latency)
+            if nexus.should_fail():
+                nexus.count(method, "error")
+                self._send(nexus._random.choice((429, 503)))
+                return False
+            return True
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == REST_PREFIX + "v1/components":
+                if self._begin("GET", "v1/components"):
+                    query = parse_qs(url.query)
+                    token = query.get('continuationToken', [None])[0]
+                    repository = query.get('repository', [None])[0]
+                    self._send(200, json.dumps(nexus.page(token, repository)).encode())
+            elif url.path == REST_PREFIX + "v1/search":
+                if self._begin("GET", "v1/search"):
+                    query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    token = query.pop('continuationToken', None)
+                    self._send(200, json.dumps(nexus.page(token, **query)).encode())
+            elif url.path == REST_PREFIX + "v1/repositories":
+                if self._begin("GET", "v1/repositories"):
+                    self._send(200, json.dumps(nexus.repository_list()).encode())
+            elif url.path in nexus.assets_by_path:
+                if self._begin("GET", "asset"):
+                    self._send(200, b"\0" * nexus.asset_size, content_type="application/java-archive")
+            elif url.path.startswith(REST_PREFIX + "v1/script") and nexus.script_api:
+                if self._begin("GET", "v1/script"):
+                    name = url.path[len(REST_PREFIX + "v1/script/"):]
+                    if name in nexus.scripts:
+                        self._send(200, json.dumps(nexus.scripts[name]).encode())
+                    else:
+                        self._send(404)
+            else:
+                nexus.count("GET", "other")
+                self._send(404)
+
+        def do_HEAD(self):
+            if self._begin("HEAD", "asset"):
+                asset = nexus.assets_by_path.get(urlparse(self.path).path)
+                if asset is not None:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/java-archive")
+                    self.send_header("Content-Length", str(nexus.asset_size))
+                    self.send_header("ETag", '"%s"' % asset['checksum']['sha1'])
+                    self.end_headers()
+                else:
+                    self._send(404)
+
+        def do_DELETE(self):
+            path = urlparse(self.path).path
+            if path.startswith(REST_PREFIX + "v1/components/"):
+                if self._begin("DELETE", "v1/components"):
+                    self._send(204 if nexus.delete(path.rsplit("/", 1)[1]) else 404)
+            else:
+                nexus.count("DELETE", "other")
+                self._send(404)
+
+        def do_PUT(self):
+            path = urlparse(self.path).path
+            body = self._body()
+            if path.startswith(REST_PREFIX + "v1/script/") and nexus.script_api:
+                if self._begin("PUT", "v1/script"):
+                    nexus.scripts[path.rsplit("/", 1)[1]] = json.loads(body)
+                    self._send(204)
+            else:
+                nexus.count("PUT", "other")
+                self._send(404)
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            body = self._body()
+            if path == REST_PREFIX + "v1/script" and nexus.script_api:
+                if self._begin("POST", "v1/script"):
+                    script = json.loads(body)
+                    nexus.scripts[script['name']] = script
+                    self._send(204)
+            elif path.startswith(REST_PREFIX + "v1/script/") and path.endswith("/run") and nexus.script_api:
+                if self._begin("POST", "v1/script/run"):
+                    name = path.split("/")[-2]
+                    if name not in nexus.scripts:
+                        self._send(404)
+                        return
+                    request = json.loads(body)
+                    deleted = [component_id for component_id in request['ids'] if nexus.delete(component_id)]
+                    self._send(200, json.dumps({'name': name, 'result': json.dumps(deleted)}).encode())
+            else:
+                nexus.count("POST", "other")
+                self._send(404)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake nexus server for tests and benchmarks")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--components", type=int, default=10000)
+    parser.add_argument("--assets", type=int, default=3, help="assets per component")
+    parser.add_argument("--asset-size", type=int, default=1024)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay added to every response in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed with 429/503")
+    parser.add_argument("--no-file-size", action="store_true", help="omit fileSize like nexus < 3.30")
+    parser.add_argument("--script-api", action="store_true", help="emulate the script api")
+    parser.add_argument("-r", default="maven-repo", help="repository names, comma separated")
+    args = parser.parse_args()
+    repositories = args.r.split(",")
+    nexus = MockNexus(args.components, args.assets, args.asset_size, args.page_size, not args.no_file_size,
+                      args.latency, repositories[0], args.error_rate, args.script_api, port=args.port,
+                      repositories=repositories)
+    nexus.start()
+    print("serving %d components of %s on %s" % (args.components, args.r, nexus.rest_url))
+    try:
+        nexus._thread.join()
+    except KeyboardInterrupt:
+        nexus.stop()
+
+
+if __name__ == "__main__":
+    main()
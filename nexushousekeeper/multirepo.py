@@ -0,0 +1,173 @@
+"""
+Housekeeping of several repositories in one run.
+
+Repositories are given as a comma separated list of names or glob patterns (``maven-*``), patterns are expanded
+with ``v1/repositories``. Each repository gets its own handler, set up for its format, and all of them share one
+HttpEngine: the connection pool and the ``--parallel`` budget are global, so processing repositories concurrently
+doesn't multiply the load on nexus. All repositories are processed concurrently on one event loop and the results
+are printed in one table.
+"""
+import asyncio
+import fnmatch
+
+from hurry.filesize import size
+from requests.auth import HTTPBasicAuth
+from rich.console import Console
+from rich.table import Table
+
+from .httpengine import HttpEngine
+from .mvnrepositoryhandler import MvnRepositoryHandler
+from .space import SpaceAccount
+
+_GLOB_CHARACTERS = "*?["
+
+
+def is_multi_repository(spec: str) -> bool:
+    """
+    :param spec: value of -r
+    :return: True if it names several repositories (comma separated list or glob pattern)
+    """
+    return ',' in spec or any(character in spec for character in _GLOB_CHARACTERS)
+
+
+def list_repositories(engine: HttpEngine, nexus_url: str) -> list:
+    """
+    :return: the repositories readable by the user, as returned by v1/repositories
+    """
+    response = engine.request('GET', nexus_url + "v1/repositories", headers={'accept': 'application/json'})
+    response.raise_for_status()
+    return response.json()
+
+
+def expand_repositories(spec: str, repositories: list) -> list:
+    """
+    Group repositories only aggregate their members, patterns don't match them.
+    :param spec: comma separated repository names or glob patterns
+    :param repositories: repositories as returned by v1/repositories
+    :return: the selected repositories as (name, format), without duplicates
+    """
+    formats = {repository['name']: repository.get('format') for repository in repositories}
+    selected = {}
+    for pattern in (part.strip() for part in spec.split(',')):
+        if not pattern:
+            continue
+        if any(character in pattern for character in _GLOB_CHARACTERS):
+            for repository in repositories:
+                if repository.get('type') != 'group' and fnmatch.fnmatchcase(repository['name'], pattern):
+                    selected.setdefault(repository['name'], repository.get('format'))
+        elif pattern in formats:
+            selected.setdefault(pattern, formats[pattern])
+        else:
+            raise ValueError("unknown repository " + pattern)
+    return list(selected.items())
+
+
+class MultiRepositoryHousekeeper:
+    """
+    Runs the same operation on several repositories concurrently
+
+    :param repositories: comma separated repository names or glob patterns
+    :param options: other MvnRepositoryHandler parameters (dry_run, prefetch, index, journal, ...)
+    """
+
+    def __init__(self, user, password, nexus_url, repositories, parallelism=20, per_host=None, retries=5,
+                 timeout=(10, 60), **options):
+        self.console = Console()
+        self.engine = HttpEngine(HTTPBasicAuth(user, password), parallelism, per_host, retries,
+                                 metrics=options.get('metrics'), timeout=timeout)
+        try:
+            self.repositories = expand_repositories(repositories, list_repositories(self.engine, nexus_url))
+        except Exception:
+            self.engine.close()
+            raise
+        self.handlers = [MvnRepositoryHandler(user, password, nexus_url, name, parallelism=parallelism,
+                                              repository_format=repository_format or 'maven2', engine=self.engine,
+                                              show_progress=False, **options)
+                         for name, repository_format in self.repositories]
+
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+        self.engine.close()
+
+    def _run(self, fun) -> dict:
+        """
+        :param fun: returns the coroutine to run for a handler, they all run concurrently on one event loop
+        :return: {repository: result}
+        """
+        async def run_all():
+            results = await asyncio.gather(*[fun(handler) for handler in self.handlers])
+            return {handler.repository: result for handler, result in zip(self.handlers, results)}
+
+        return asyncio.run(run_all())
+
+    def _delete(self, plan) -> dict:
+        """
+        :param plan: returns the components to delete for a handler
+        :return: {repository: DeleteReport}, the space being accounted once for all repositories
+        """
+        space = SpaceAccount()
+        return self._report(self._run(lambda handler: handler.delete(plan(handler), space)), space)
+
+    def delete_all_components(self) -> dict:
+        return self._delete(lambda handler: handler.plan())
+
+    def delete_all_component_by_version_pattern(self, version_pattern: str, group=None) -> dict:
+        return self._delete(lambda handler: handler.plan(version_pattern=version_pattern, group=group))
+
+    def delete_all_components_by_version(self, version, group=None) -> dict:
+        return self._delete(lambda handler: handler.plan(version=version, group=group))
+
+    def keep_lasts_versions(self, last_version_count: int, older_than_days=None) -> dict:
+        return self._delete(lambda handler: handler.plan(last_version_count=last_version_count,
+                                                         older_than_days=older_than_days))
+
+    def apply_policy(self, policy) -> dict:
+        return self._delete(lambda handler: handler.plan(policy=policy))
+
+    def resume_deletion(self) -> dict:
+        return self._delete(lambda handler: handler._journal_remaining())
+
+    def _report(self, reports: dict, space: SpaceAccount) -> dict:
+        """
+        Display one line per repository, then the space reclaimed by blob store
+        :param reports: {repository: DeleteReport}
+        """
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Repository")
+        table.add_column("Deleted", justify="right")
+        table.add_column("Freed", justify="right")
+        table.add_column("Reclaimed", justify="right")
+        table.add_column("Failed", justify="right")
+        for repository, report in reports.items():
+            table.add_row(repository, str(report.deleted), size(report.bytes_freed), size(report.bytes_reclaimed),
+                          str(len(report.failures)))
+        self.console.print(table)
+        self.console.print(space.table())
+        self.console.print("Free memory :[bold]" + size(sum(report.bytes_reclaimed for report in reports.values()))
+                           + "[/bold]")
+        return reports
+
+    def show_all_components(self, with_size=True) -> dict:
+        """
+        Display the number of artifacts, versions and the size of each repository
+        :return: {repository: ComponentColumns}
+        """
+        space = SpaceAccount()
+        results = self._run(lambda handler: handler.report(with_size, space=space))
+
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Repository")
+        table.add_column("Format")
+        table.add_column("Artifacts", justify="right")
+        table.add_column("Versions", justify="right")
+        table.add_column("Size", justify="right")
+        for name, repository_format in self.repositories:
+            columns = results[name]
+            table.add_row(name, repository_format or "", str(len(columns.totals('artifact'))),
+                          str(len(columns.totals('artifact-version'))), size(columns.total_size))
+        self.console.print(table)
+        if with_size:
+            self.console.print(space.table())
+        self.console.print("Total size : " + size(sum(columns.total_size for columns in results.values())))
+        return results
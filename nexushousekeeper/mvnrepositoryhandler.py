@@ -1,176 +1,308 @@
-import requests
 from requests.auth import HTTPBasicAuth
-import re
-import datetime
 from rich.console import Console
 from rich.table import Table
-from rich.progress import Progress
 from hurry.filesize import size
-from requests_futures.sessions import FuturesSession
-from concurrent.futures import as_completed
 import asyncio
-import math
+import datetime
+import queue
+import threading
+import time
+from .bulkdelete import BulkDeleter, DeleteReport
+from .columns import ComponentColumns
+from .formats import get_format
+from .httpengine import HttpEngine, aiterate, run_bounded
+from .queryplan import plan_queries, residual_filter, split_groups
+from . import retention
+from .sizeresolver import AssetSizeResolver
+from .space import SpaceAccount
+
+_END_OF_PAGES = object()
+
+
+class _NoStatus:
+    """Stands for a rich status when progress isn't displayed"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
 
 
 class MvnRepositoryHandler:
+    """
+    Operations on the components of one nexus repository. Despite its name, any format is supported:
+    repository_format selects the search keys (maven2, npm, docker, raw).
+
+    Several handlers can share one HttpEngine, and so one connection pool and one concurrency budget.
+    """
     cred = None
     nexus_url = None
     repository = None
     dryRun = None
 
-    aggregates: str = None
+    columns: ComponentColumns = None
+    space: SpaceAccount = None
     total_size: int = None
 
-    version_pattern = r'(\d*\.?\d*\.?\d*)'
-    date_pattern = r"(\d{8}\.\d{6})"
-    snapshot_finder = re.compile(version_pattern + r"-?" + date_pattern + r"?-?\d*")
-
-    def __init__(self, user, password, nexus_url, repository, dry_run=False, parallelism=20):
+    def __init__(self, user, password, nexus_url, repository, dry_run=False, parallelism=20, prefetch=2,
+                 per_host=None, index=None, refresh_index=True, retries=5, rate=None, use_script=False,
+                 journal=None, repository_format='maven2', engine=None, show_progress=True,
+                 size_cache=None, metrics=None, pushdown=True, timeout=(10, 60)):
         self.cred = HTTPBasicAuth(user, password)
         self.nexus_url = nexus_url
         self.repository = repository
         self.dryRun = dry_run
-        self.versions_cache = {}
         self.parallelism = parallelism
+        self.prefetch = prefetch
         self.console = Console()
+        self.format = get_format(repository_format)
+        self.show_progress = show_progress
+        self._owns_engine = engine is None
+        self.engine = engine if engine is not None else HttpEngine(self.cred, parallelism, per_host, retries,
+                                                                   metrics=metrics, timeout=timeout)
+        self.metrics = metrics
+        self.size_resolver = AssetSizeResolver(self.engine, size_cache)
+        self.index = index
+        self.refresh_index = refresh_index
+        self.rate = rate
+        self.use_script = use_script
+        self.journal = journal
+        self.pushdown = pushdown
+
+    def close(self) -> None:
+        """
+        Release the connection pool, unless it is shared
+        """
+        if self._owns_engine:
+            self.engine.close()
+        if self.index is not None:
+            self.index.close()
+        if self.size_resolver.cache is not None:
+            self.size_resolver.cache.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    def _status(self, message):
+        if self.show_progress:
+            return self.console.status(message)
+        return _NoStatus()
 
     def _get_all_components(self, token=None):
         params = {'repository': self.repository}
         if token:
             params['continuationToken'] = token
-        response = requests.get(self.nexus_url + "v1/components", auth=self.cred,
-                                params=params, headers={'accept': 'application/json'})
+        response = self.engine.request('GET', self.nexus_url + "v1/components",
+                                       params=params, headers={'accept': 'application/json'})
         response.raise_for_status()
         return response
 
-    def _search_components(self, token=None, name=None, group=None, version=None):
+    def _search_components(self, token=None, name=None, group=None, version=None, version_glob=None):
         params = {'repository': self.repository}
         if token:
             params['continuationToken'] = token
-        if name:
-            params['maven.artifactId'] = name
-        if group:
-            params['maven.groupId'] = group
-        if version:
-            params['maven.baseVersion'] = version
-        response = requests.get(self.nexus_url + "v1/search", auth=self.cred,
-                                params=params, headers={'accept': 'application/json'})
+        params.update(self.format.search_params(name, group, version, version_glob))
+        response = self.engine.request('GET', self.nexus_url + "v1/search",
+                                       params=params, headers={'accept': 'application/json'})
         response.raise_for_status()
         return response
 
-    def _get_components_as_list(self, fun, **args) -> list:
-        response = fun(**args)
-        components = self._fill_tmp_array_from_json(response.json())
-        with self.console.status("[bold green]Gathering components metadata...") as status:
-            while 'continuationToken' in response.json() and response.json()['continuationToken']:
-                response = fun(token=response.json()['continuationToken'], **args)
-                components += (self._fill_tmp_array_from_json(response.json()))
-        return components
-
-    def show_all_components(self, with_size=True) -> None:
+    def _fetch_pages(self, fun, **args):
         """
-        Display a table with all components
-        :param with_size:
-        :return: None
+        Follow the continuation tokens of a nexus listing, each page is parsed only once
+        :param fun: function requesting one page (_get_all_components or _search_components)
+        :return: a generator of the raw json pages
         """
-        components = self._get_components_as_list(self._get_all_components)
-        aggregates_components, total_size = self.aggregates_components(components, with_size)
-        aggregates_version, total_size2 = self.aggregates_versions(components, with_size)
+        token = None
+        while True:
+            start = time.monotonic()
+            page = fun(token=token, **args).json()
+            if self.metrics is not None:
+                self.metrics.observe("page_seconds", time.monotonic() - start)
+            yield page
+            token = page.get('continuationToken')
+            if not token:
+                break
+
+    def _iter_component_pages(self, fun, **args):
+        """
+        Stream a nexus listing page by page. When prefetch is enabled, page N+1 is requested as soon as its
+        continuation token is known, while page N is converted and handled downstream.
 
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("Name", style="dim")
-        table.add_column("Versions")
-        for k, v in aggregates_components.items():
-            table.add_row(k, ", ".join(v))
-        self.console.print(table)
+        With a component index, the listing refreshes it on the fly, or is read from it without any request if
+        refresh_index is False.
+        :param fun: function requesting one page (_get_all_components or _search_components)
+        :return: a generator of component lists, one per page
+        """
+        if self.index is not None and not self.refresh_index:
+            yield from self.index.iter_component_pages(self.repository, **args)
+            return
+        pages = self._fetch_pages(fun, **args)
+        if self.prefetch > 0:
+            pages = self._read_ahead(pages)
+        pages = (self._fill_tmp_array_from_json(page) for page in pages)
+        if self.index is not None:
+            pages = self.index.refresh(self.repository, pages, complete=fun == self._get_all_components)
+        yield from pages
+
+    def _read_ahead(self, *sources):
+        """
+        Consume page generators in background threads, keeping at most self.prefetch pages ahead. Several
+        generators are consumed in parallel, by at most self.parallelism threads, their pages are yielded as they
+        come.
+        :param sources: generators of pages
+        :return: a generator of the pages of all sources
+        """
+        workers = min(len(sources), self.parallelism)
+        buffer = queue.Queue(maxsize=max(self.prefetch, 1) * workers)
+        stop = threading.Event()
+        sources = iter(sources)
+        sources_lock = threading.Lock()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch():
+            try:
+                while True:
+                    with sources_lock:
+                        pages = next(sources, None)
+                    if pages is None:
+                        break
+                    for page in pages:
+                        if not put(page):
+                            return
+                put(_END_OF_PAGES)
+            except Exception as e:
+                put(e)
+
+        for _ in range(workers):
+            threading.Thread(target=fetch, name="nexushousekeeper-prefetch", daemon=True).start()
+        try:
+            while workers:
+                item = buffer.get()
+                if item is _END_OF_PAGES:
+                    workers -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def _iter_components(self, fun, **args):
+        """
+        Stream the components of a nexus listing, memory stays bounded by the page size
+        :return: a generator of components
+        """
+        for page in self._iter_component_pages(fun, **args):
+            yield from page
 
-        versions_table = Table(show_header=True, header_style="bold magenta")
-        versions_table.add_column("Versions")
-        versions_table.add_column("Size")
-        for version, version_size in aggregates_version.items():
-            versions_table.add_row(version, size(version_size))
-        self.console.print(versions_table)
+    def _get_components_as_list(self, fun, **args) -> list:
+        components = []
+        with self._status("[bold green]Gathering components metadata..."):
+            for page in self._iter_component_pages(fun, **args):
+                components += page
+        return components
 
-        self.console.print("Total size : " + size(total_size))
+    def show_all_components(self, with_size=True, top=20, group_by=None, page=1, page_size=50,
+                            export=None) -> ComponentColumns:
+        """
+        Display the largest artifacts, versions and groups, and the size by age
+        :param with_size: if False, only count components
+        :param top: number of rows of each table
+        :param group_by: display one page of this group-by (one of grouping.GROUP_BY) instead of the top tables
+        :param export: write the group-by (artifact-version by default) to this .csv or .json file
+        :return: the components as columns
+        """
+        columns = self.collect_columns(self._iter_components(self._get_all_components), with_size)
+        if group_by:
+            self.console.print(self._table(group_by, columns.page(group_by, page, page_size),
+                                           "%s, page %d" % (group_by, page)))
+        else:
+            for by in ('artifact', 'version', 'group'):
+                self.console.print(self._table(by, columns.top(by, top), "top %d %ss" % (top, by)))
+            self.console.print(self._table('age', columns.totals('age'), "by age"))
+        if export:
+            rows = columns.export(export, group_by or 'artifact-version')
+            self.console.print("%d rows exported to %s" % (rows, export))
+        if with_size:
+            self.console.print(self.space.table())
+        self.console.print("Total size : " + size(columns.total_size))
+        return columns
+
+    @staticmethod
+    def _table(by: str, rows: list, title: str) -> Table:
+        table = Table(show_header=True, header_style="bold magenta", title=title)
+        table.add_column(by.capitalize(), style="dim")
+        table.add_column("Size", justify="right")
+        table.add_column("Components", justify="right")
+        for label, total_size, count in rows:
+            table.add_row(label, size(total_size), str(count))
+        return table
 
     def aggregates_versions(self, components: list, with_size: bool) -> tuple:
-        aggregates, total_size = self._get_components_size(components, size)
-        aggregates_versions = {}  # {'versions':10,'version2':15'}
-        for artefact, versions_size in aggregates.items():
-            for k, v in versions_size.items():
-                if k in aggregates_versions:
-                    aggregates_versions[k] += v
-                else:
-                    aggregates_versions[k] = v
-
-        return aggregates_versions, total_size
+        columns = self.collect_columns(components, with_size)
+        return {version: total_size for version, total_size, _ in columns.totals('version')}, columns.total_size
 
     def aggregates_components(self, components: list, with_size: bool) -> tuple:
-
-        aggregates, total_size = self._get_components_size(components, size)
+        columns = self.collect_columns(components, with_size)
         aggregate_as_string = {}  # {"group:id":{"version1 [size1],"version2 [size2]"}}
-        for k, v in aggregates.items():
-            for k2, v2 in v.items():
-                if k not in aggregate_as_string:
-                    aggregate_as_string[k] = set()
-                aggregate_as_string[k].add(k2 + " [" + size(v2) + "]")
-        return aggregate_as_string, total_size
-
-    def _get_components_size(self, components: list, with_size: bool) -> tuple:
-        if not self.aggregates and not self.total_size:
-            self.aggregates = {}  # Map as {"group:id":{"version1":size1,"version2":size2}}
-            self.total_size = 0
-
-            def _add_to_aggregates(key, version, comp_size=None):
-                if key in self.aggregates:
-                    if version in self.aggregates[key]:
-                        # aggregate size
-                        self.aggregates[key][version] += comp_size
-                    else:
-                        self.aggregates[key][version] = comp_size
-                else:
-                    self.aggregates[key] = {}
-                    self.aggregates[key][version] = comp_size
-
-            regex = re.compile(r"^(.*)-" + self.date_pattern + r"-?\d*")
-
-            async def _handle_components(x, with_size):
-                comp_size = None
-                if with_size:
-                    comp_size = await loop.run_in_executor(None, self._components_size, x)
-                    self.total_size += comp_size
-                key = x["group"] + ":" + x["name"]
-                match = regex.match(x["version"])
-                if match:
-                    # Check if snapshot
-                    version = match.group(1)
-                    if match.group(2):
-                        version += "-SNAPSHOT"
-                    _add_to_aggregates(key, version, comp_size)
-                else:
-                    if re.compile(r"^[0-9\.]*").match(x["version"]):
-                        _add_to_aggregates(key, x["version"], comp_size)
-                    else:
-                        print(x["version"] + " ignored")
-
-            with Progress() as progress:
-                ceil = math.ceil(len(components) / self.parallelism)
-                gather_data = progress.add_task("[green]Gathering size data ....", total=ceil)
-
-                for batch in self.batch_generator(components, self.parallelism):
-                    tasks = [_handle_components(x, with_size) for x in batch]
-                    loop = asyncio.get_event_loop()
-                    loop.run_until_complete(asyncio.gather(*tasks))
-                    progress.update(gather_data, advance=1)
-        return self.aggregates, self.total_size
+        for artifact, versions in columns.nested('artifact', 'version').items():
+            aggregate_as_string[artifact] = {version + " [" + size(version_size) + "]"
+                                             for version, version_size in versions.items()}
+        return aggregate_as_string, columns.total_size
+
+    def collect_columns(self, components, with_size: bool) -> ComponentColumns:
+        """
+        Size components and store them as columns, computed once per handler
+        :param components: any iterable of components
+        :param with_size: if False, sizes are not resolved and count as 0
+        """
+        return self._run(self.report(with_size, components))
+
+    async def report(self, with_size=True, components=None, space=None) -> ComponentColumns:
+        """
+        Same as collect_columns, on the running event loop. The deduplicated space by blob store is kept in
+        self.space.
+        :param components: any iterable or async iterable of components, the whole repository by default
+        :param space: SpaceAccount shared with other repositories, a new one by default
+        """
+        if self.columns is None:
+            if components is None:
+                components = self._iter_components(self._get_all_components)
+            columns = ComponentColumns()
+            account = space if space is not None else SpaceAccount()
+
+            with self._status("[green]Gathering size data ....") as status:
+                async def _handle_components(component):
+                    comp_size = await self._components_size_async(component) if with_size else None
+                    columns.append(component, comp_size)
+                    account.add(component, comp_size)
+                    status.update("[green]Gathering size data .... %d components" % len(columns))
+
+                await run_bounded(components, _handle_components, self.parallelism)
+            self.columns = columns
+            self.space = account
+            self.total_size = columns.total_size
+        return self.columns
 
     def _fill_tmp_array_from_json(self, json) -> list:
         components = []
         for item in json['items']:
             # print(item)
             components.append(
-                {'name': item['name'], 'version': item['version'], 'id': item['id'], 'group': item['group'],
-                 'assets': item['assets']})
+                {'name': item['name'], 'version': item['version'], 'id': item['id'], 'group': item.get('group'),
+                 'repository': item.get('repository'), 'assets': item['assets']})
         return components
 
     def _components_size(self, component: dict) -> int:
@@ -179,142 +311,231 @@ class MvnRepositoryHandler:
         :param component:
         :return: the size in bytes
         """
-        size = 0
-        with FuturesSession() as session:
-
-            futures = []
-            for asset in component['assets']:
-                futures.append(session.head(asset['downloadUrl'], auth=self.cred))
-            for future in as_completed(futures):
-                resp = future.result()
-                size += int(resp.headers['Content-Length'])
-        return size
+        return self.size_resolver.resolve(component)
 
-    def delete_all_components(self) -> None:
+    async def _components_size_async(self, component: dict) -> int:
+        """
+        Same as _components_size, without blocking the event loop
+        :param component:
+        :return: the size in bytes
+        """
+        unsized = self.index is not None and any(asset.get('fileSize') is None
+                                                 for asset in component.get('assets', ()))
+        start = time.monotonic()
+        comp_size = await self.size_resolver.aresolve(component)
+        if self.metrics is not None:
+            self.metrics.observe("sizing_seconds", time.monotonic() - start)
+        if unsized:
+            self.index.store_sizes(component)
+        return comp_size
+
+    def _run(self, coroutine):
+        """
+        Run a coroutine of the async api from synchronous code, in its own event loop. Code already running in an
+        event loop must await plan, delete and report instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        coroutine.close()
+        raise RuntimeError("called from a running event loop, await the async api (plan, delete, report) instead")
+
+    def delete_all_components(self) -> DeleteReport:
         """
         Delette all components in the registry
-        :return: None
+        :return: the deletion report
         """
-        components = self._get_components_as_list(self._get_all_components)
-        self._delete_components_in_array(components)
+        return self._run(self.delete(self.plan()))
 
-    def _delete_component(self, id: str):
-        if not self.dryRun:
-            response = requests.delete(self.nexus_url + "v1/components/" + id, auth=self.cred)
-            response.raise_for_status()
+    def delete_all_component_by_version_pattern(self, version_pattern: str, group=None) -> DeleteReport:
+        return self._run(self.delete(self.plan(version_pattern=version_pattern, group=group)))
 
-    def delete_all_component_by_version_pattern(self, version_pattern: str):
-        self._delete_components_in_array(
-            self._filter_components_by_version_pattern(self._get_components_as_list(self._get_all_components),
-                                                       version_pattern))
+    def _search(self, version_pattern=None, version=None, group=None):
+        """
+        List the components matching a version pattern, an exact version and groups with the narrowest searches,
+        see queryplan
+        :param group: group, glob pattern or comma separated list of them
+        :return: a generator of components
+        """
+        groups = split_groups(group)
+        if version is None and not self.pushdown:
+            queries = []
+        else:
+            queries = plan_queries(self.format, version_pattern, version, groups)
+        if not queries:
+            components = self._iter_components(self._get_all_components)
+        elif len(queries) == 1:
+            components = self._iter_components(self._search_components, **queries[0])
+        else:
+            pages = self._read_ahead(*[self._iter_component_pages(self._search_components, **query)
+                                       for query in queries])
+            components = (component for page in pages for component in page)
+        if version_pattern is None and not groups:
+            return components
+        return residual_filter(components, version_pattern, groups, unique=len(queries) > 1)
+
+    def _plan(self, version_pattern=None, version=None, group=None, last_version_count=None, policy=None,
+              older_than_days=None):
+        """
+        Select the components to delete, see plan
+        :return: a generator of components consuming the listing lazily
+        """
+        components = self._search(version_pattern, version, group)
+        if policy is not None:
+            components = policy.evaluate(components, metrics=self.metrics)
+        if last_version_count is not None:
+            older_than = None
+            if older_than_days is not None:
+                older_than = (datetime.datetime.now(datetime.timezone.utc)
+                              - datetime.timedelta(days=int(older_than_days)))
+            components = retention.VersionTimeline(int(last_version_count), older_than).deletable(components)
+        if self.journal is not None and not self.dryRun:
+            components = self._journaled(components)
+        return components
 
-    def _delete_components_in_array(self, components: list) -> None:
+    def _journaled(self, components):
+        """
+        Record every planned component in the journal as soon as it is selected, before its deletion is queued, so
+        a resume covers the whole plan listed until the interruption. Components a previous run deleted are skipped.
+        :return: a generator of the components not deleted yet
+        """
+        for component in components:
+            if component['id'] in self.journal.done:
+                continue
+            sizes = [asset.get('fileSize') for asset in component.get('assets') or ()]
+            self.journal.planned(component, sum(int(asset_size) for asset_size in sizes) if None not in sizes else None)
+            yield component
+
+    async def plan(self, version_pattern=None, version=None, group=None, last_version_count=None, policy=None,
+                   older_than_days=None):
+        """
+        Async generator of the components to delete, pulled from the listing as they are consumed
+        :param version_pattern: regex the version must start with, its literal prefix is searched server side
+        :param version: exact base version, searched server side
+        :param group: group, glob pattern or comma separated list of them, searched server side in parallel
+        :param last_version_count: keep the last versions of each artifact, delete the others as soon as they are
+                                   out of the last ones, while the listing goes on
+        :param older_than_days: with last_version_count, only delete the components older than this
+        :param policy: a policy.Policy
+        """
+        async for component in aiterate(self._plan(version_pattern, version, group, last_version_count, policy,
+                                                   older_than_days)):
+            yield component
+
+    def _delete_components_in_array(self, components: list) -> DeleteReport:
         """
         If dryrun is True, only display which component should be deleted
-        :param components: component to delete
-        :return: None
+        :param components: component to delete, any iterable: deletion starts as soon as the first page is listed
+        :return: the deletion report, what would be deleted on a dry run
+        """
+        return self._run(self.delete(components))
+
+    async def delete(self, components, space=None) -> DeleteReport:
+        """
+        Same as _delete_components_in_array, on the running event loop
+        :param components: any iterable or async iterable of components, e.g. plan()
+        :param space: SpaceAccount shared with the deletions of other repositories, a new one by default
         """
         total_size = 0
+        deleter = BulkDeleter(self.engine, self.nexus_url, self.repository, self.use_script, rate=self.rate,
+                              on_deleted=self._on_deleted, on_failed=self._on_failed)
+        deleter.report.space = space if space is not None else SpaceAccount()
+        reclaimed = 0  # bytes not shared with a component deleted before
+
+        with self._status("[green]Deleting components ....") as status:
+
+            async def _handle_components(comp):
+                nonlocal total_size, reclaimed
+                if comp.get('size') is not None:
+                    # planned by a journal
+                    comp_size = comp['size']
+                else:
+                    comp_size = await self._components_size_async(comp)
+                total_size += comp_size
+                reclaimed += deleter.report.space.add(comp, comp_size)
+                if self.dryRun:
+                    deleter.report.add(comp_size)
+                    self.console.print(
+                        "deleting " + comp['name'] + ':' + comp['version'] + ' ' + size(comp_size))
+                else:
+                    if self.journal is not None:
+                        self.journal.planned(comp, comp_size)
+                    await deleter.add(comp, comp_size)
+                    status.update("[green]Deleting components .... %d deleted, %.1f/s, %s freed"
+                                  % (deleter.report.deleted, deleter.report.rate, size(deleter.report.bytes_freed)))
+
+            await run_bounded(components, _handle_components, self.parallelism)
+            await deleter.flush()
+            failures = await deleter.retry_failures()
+
+        for component_id, (comp, comp_size) in failures.items():
+            self.console.print("[red]failed to delete " + component_id + "[/red]")
+            reclaimed -= deleter.report.space.remove(comp, comp_size)
+        deleter.report.failures = {component_id: comp_size for component_id, (_, comp_size) in failures.items()}
+        deleter.report.bytes_reclaimed = reclaimed
+        if space is None:
+            self.console.print(deleter.report.space.table())
+        self.console.print("Free memory :[bold]" + size(deleter.report.bytes_reclaimed) + "[/bold] ("
+                           + size(total_size) + " listed)")
+        if self.metrics is not None:
+            labels = {'repository': self.repository, 'dry_run': str(bool(self.dryRun)).lower()}
+            self.metrics.inc("deleted_total", deleter.report.deleted, **labels)
+            self.metrics.inc("bytes_freed_total", deleter.report.bytes_freed, **labels)
+            self.metrics.inc("bytes_reclaimed_total", deleter.report.bytes_reclaimed, **labels)
+            self.metrics.inc("delete_failures_total", len(failures), **labels)
+        return deleter.report
+
+    def _on_deleted(self, component_id: str) -> None:
+        if self.index is not None:
+            self.index.remove(component_id)
+        if self.journal is not None:
+            self.journal.deleted(component_id)
+
+    def _on_failed(self, component_id: str, error) -> None:
+        if self.journal is not None:
+            self.journal.failed(component_id, error)
+
+    def resume_deletion(self) -> DeleteReport:
+        """
+        Finish the deletions planned in the journal by an interrupted run, without listing the repository.
+        Components listed after the interruption are not in the journal: run the command again to handle them.
+        """
+        return self._run(self.delete(self._journal_remaining()))
 
-        async def _handle_components(comp):
-            comp_size = self._components_size(comp)
-            nonlocal total_size
-            total_size += comp_size
-            if self.dryRun:
-                self.console.print(
-                    "deleting " + comp['name'] + ':' + comp['version'] + ' ' + size(comp_size))
-            else:
-                self._delete_component(comp['id'])
-
-        with Progress() as progress:
-            ceil = math.ceil(len(components) / self.parallelism)
-            gather_data = progress.add_task("[green]Deleting components ....", total=ceil, visible=not self.dryRun)
-
-            for batch in self.batch_generator(components, self.parallelism):
-                tasks = [_handle_components(x) for x in batch]
-                # for x in components:
-                #    _handle_components(x)
-                loop = asyncio.get_event_loop()
-                loop.run_until_complete(asyncio.gather(*tasks))
-                progress.update(gather_data, advance=1)
-
-        self.console.print("Free memory :[bold]" + size(total_size) + "[/bold]")
-
-    def delete_all_components_by_version(self, version):
-        self._delete_components_in_array(self._get_components_as_list(self._search_components, version=version))
+    def _journal_remaining(self) -> list:
+        return [component for component in self.journal.remaining(self.journal.path)
+                if (component['repository'] or self.repository) == self.repository]
+
+    def delete_all_components_by_version(self, version, group=None) -> DeleteReport:
+        return self._run(self.delete(self.plan(version=version, group=group)))
 
     def _filter_components_by_version_pattern(self, components: list, pattern: str):
         """
 
-        :param components: componenet list to filter
+        :param components: componenet iterable to filter
         :param pattern: pattern to match
-        :return: component list that matchthe pattern
+        :return: a generator of the components matching the pattern
         """
 
-        patched_pattern = "^" + pattern
-        comp = re.compile(patched_pattern)
-
-        def matcher(component):
-            m = comp.match(component['version'])
-            if m is not None:
-                return component
-
-        return [v for v in map(matcher, components) if v is not None]
+        return residual_filter(components, pattern)
 
-    def keep_lasts_versions(self, last_version_count: int) -> None:
+    def keep_lasts_versions(self, last_version_count: int, older_than_days=None) -> DeleteReport:
         """
         Conserve les dernière versions des artefacts
         :param last_version_count:
+        :param older_than_days: only delete the versions older than this number of days
         """
 
-        all_artefacts = self._get_components_as_list(self._get_all_components)
-        artefact_to_keep = self._get_last_versions(all_artefacts, last_version_count)
-        artefact_to_delete = [item for item in all_artefacts if item not in artefact_to_keep]
-        self._delete_components_in_array(artefact_to_delete)
+        return self._run(self.delete(self.plan(last_version_count=last_version_count,
+                                               older_than_days=older_than_days)))
 
-    def _get_last_versions(self, components: list, last_version_count: int):
-        for component in components:
-            self._get_most_recent_artefact_for_version(component)
-
-        version_by_component = {}
-
-        for k, v in self.versions_cache.items():
-            if k[0] not in version_by_component:
-                version_by_component[k[0]] = {k[1]: v["component"]}
-            else:
-                version_by_component[k[0]][k[1]] = v["component"]
-
-        print(version_by_component)
-        to_return = []
-        for k, v in version_by_component.items():
-            to_return += map(lambda x: x[1], sorted(v.items(), reverse=True)[0:int(last_version_count)])
-
-        return to_return
-
-    # TODO mettre version_cache et _get_most_recent_artefact_for_version dans une autre classe
-    # versions_cache = {}  # exemple : {(group:name,2.1.1):{"date":date,"version":"2.1.1-20201208.134457-2"}}
-
-    def _get_most_recent_artefact_for_version(self, component: dict) -> None:
-        """
-        Utilisé pour les snapshots pour lesquels plusieurs artefacts existent pour la même version
-        :param component: dict
-        :return: None
-        """
-        dategroup = self.snapshot_finder.match(component["version"])
-        short_version = dategroup.group(1)
-        key = (component["group"] + ":" + component["name"], short_version)
-        if dategroup.group(2):
-            date = datetime.datetime.strptime(dategroup.group(2), '%Y%m%d.%H%M%S')
-            if (key in self.versions_cache and date > self.versions_cache[key][
-                "date"]) or key not in self.versions_cache:
-                self.versions_cache[key] = {"date": date, "component": component}
-        elif dategroup.group(1):
-            self.versions_cache[key] = {"component": component}
-        else:
-            print("ignore version " + component["version"] + " pour l'artefact " + component["group"] + ":" + component[
-                "name"])
+    def apply_policy(self, policy) -> DeleteReport:
+        """
+        Delete the components selected by a retention policy, classified in one pass over the listing
+        :param policy: a policy.Policy
+        """
+        return self._run(self.delete(self.plan(policy=policy)))
 
-    def batch_generator(self, lst, n):
-        """Yield successive n-sized chunks from lst."""
-        for i in range(0, len(lst), n):
-            yield lst[i:i + n]
+    def _get_last_versions(self, components: list, last_version_count: int):
+        return retention.last_versions(components, int(last_version_count))
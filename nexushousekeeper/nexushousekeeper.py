@@ -1,44 +1,294 @@
+"""
+Command line entry point.
+
+Operations are subcommands (show, delete, keep-last, policy, resume); the flags of the previous versions (-s, -l,
+--version-match, --version, --policy, --resume) are still accepted when no subcommand is given. Only argparse is
+imported at load: the http, rich and asyncio based modules are imported once the arguments are valid, so -h,
+argument errors and runs rejected early stay fast.
+"""
 import argparse
-from .mvnrepositoryhandler import MvnRepositoryHandler
+import sys
+
+from .grouping import GROUP_BY
+
+COMMANDS = ('show', 'delete', 'keep-last', 'policy', 'resume')
+# options of show displaying the tables of one repository
+SINGLE_REPOSITORY_SHOW_OPTIONS = ('top', 'group_by', 'page', 'page_size', 'export')
 
+# values of the options a subcommand doesn't define
+DEFAULTS = dict(s=False, top=20, group_by=None, page=1, page_size=50, export=None, no_size=True, version_match=None,
+                version=None, groupid=None, l=None, policy=None, dryrun=False, rate=None, bulk_script=False,
+                journal=None, resume=False, no_pushdown=False, older_than=None)
 
-def main():
-    parser = argparse.ArgumentParser(description="Script permetant de faire des opérations sur des composants nexus")
+
+def _add_connection_arguments(parser):
     parser.add_argument("-u", help="nom de l'utilisateur nexus", required=True)
     parser.add_argument("-p", help="mot de passe de l'utilisateur nexus", required=True)
-    parser.add_argument("-r", help="repository", required=True)
-    parser.add_argument("-s", help="affiche l'ensemble des versions pour chaque composants", action="store_true")
+    parser.add_argument("-r", help="repository, or several as a comma separated list of names or glob patterns "
+                                   "(maven-*) processed concurrently", required=True)
+    parser.add_argument("--format", help="format of the repository (maven2, npm, docker, raw...) when -r names a "
+                                         "single one (default maven2), read from nexus otherwise", default='maven2')
     parser.add_argument("--nexus-url", help="la base path de l'api nexus", required=True)
-    parser.add_argument("--version-match",
-                        help="supprime tous les artefacts dont le numéro de version réponds à l'expression")
-    parser.add_argument("--version",
-                        help="delete all components with this exact version")
-    parser.add_argument("--groupid",
-                        help="delete all components with this groupId, version must be set")
-    parser.add_argument("-l",
-                        help="conserve uniquement les n dernière version. Ne fonctionne uniquement qu'avec les "
-                             "versions au format X.Y.Z")
-    parser.add_argument("--dryrun",
-                        help="n'execute pas réellement la requête mais affiche les composants potentiellement effacés",
-                        action="store_true")
     parser.add_argument("--parallel",
                         help="number of parallel tasks (default 20)", default=20)
+    parser.add_argument("--per-host",
+                        help="maximum number of concurrent requests sent to the same host (default --parallel)",
+                        default=None)
+    parser.add_argument("--prefetch",
+                        help="number of listing pages fetched ahead while the current one is processed, 0 to "
+                             "disable (default 2)", default=2)
+    parser.add_argument("--retries",
+                        help="number of retries of a request failing with 429 or 5xx (default 5)", default=5)
+    parser.add_argument("--timeout",
+                        help="seconds to wait for a connection and then for each read of an answer, a request timing "
+                             "out is retried (default 10,60)", default="10,60")
+    parser.add_argument("--index",
+                        help="local index file (SQLite) of components, assets and sizes, refreshed incrementally")
+    parser.add_argument("--size-cache",
+                        help="file (SQLite) keeping the sizes obtained with HEAD requests across runs, for nexus "
+                             "versions without fileSize")
+    parser.add_argument("--offline",
+                        help="run against the local index without listing the repository, requires --index",
+                        action="store_true")
+    parser.add_argument("--metrics",
+                        help="write request counts, latencies, retries and bytes freed to this Prometheus textfile")
+    parser.add_argument("--summary", help="write a JSON summary of the run to this file")
+    parser.add_argument("--profile", help="profile the run with cProfile and write the pstats to this file, only the "
+                                          "main thread is profiled: not the requests sent by the executor threads "
+                                          "nor the listing read ahead")
+
+
+def _add_show_arguments(parser):
+    parser.add_argument("--top", help="number of rows of the tables displayed by -s (default 20)", default=20)
+    parser.add_argument("--group-by", help="with -s, display one page of sizes by artifact, version, group, age or "
+                                           "artifact-version instead of the top tables",
+                        choices=GROUP_BY)
+    parser.add_argument("--page", help="page displayed by --group-by (default 1)", default=1)
+    parser.add_argument("--page-size", help="rows per page of --group-by (default 50)", default=50)
+    parser.add_argument("--export", help="with -s, write the sizes by --group-by (artifact-version by default) to "
+                                         "a .csv or .json file")
     parser.add_argument("--no-size",
                         help="don't grab size of each object", action="store_false", default=True)
-    # TODO make some parameters mandatory
-    args = parser.parse_args()
 
-    nexus = MvnRepositoryHandler(args.u, args.p, args.nexus_url, args.r, args.dryrun, int(args.parallel))
+
+def _add_deletion_arguments(parser):
+    parser.add_argument("--dryrun",
+                        help="n'execute pas réellement la requête mais affiche les composants potentiellement effacés",
+                        action="store_true")
+    parser.add_argument("--rate",
+                        help="maximum number of components deleted per second (default unlimited)", default=None)
+    parser.add_argument("--bulk-script",
+                        help="delete components server side by chunks through the script api (v1/script) when it "
+                             "is enabled, a groovy script is uploaded to nexus", action="store_true")
+    parser.add_argument("--journal",
+                        help="append the planned and deleted components to this file, to resume an interrupted run")
+
+
+def _add_selection_arguments(parser, required=False):
+    # the flags of the previous versions accept both, --version-match taking precedence
+    selection = parser.add_mutually_exclusive_group(required=True) if required else parser
+    selection.add_argument("--version-match",
+                           help="supprime tous les artefacts dont le numéro de version réponds à l'expression")
+    selection.add_argument("--version",
+                           help="delete all components with this exact version")
+    parser.add_argument("--groupid",
+                        help="with --version or --version-match, only delete in this groupId, or several as a comma "
+                             "separated list of groupIds or glob patterns searched in parallel")
+    parser.add_argument("--no-pushdown",
+                        help="list the whole repository and filter the versions client side instead of searching "
+                             "the literal prefix of --version-match server side", action="store_true")
+
+
+def _add_older_than_argument(parser):
+    parser.add_argument("--older-than", type=int,
+                        help="with -l or keep-last, only delete the versions older than this number of days")
+
+
+def _legacy_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Script permetant de faire des opérations sur des composants nexus",
+        epilog="Operations are also available as subcommands: %s. Run 'nexushousekeeper <subcommand> -h' for "
+               "their options." % ", ".join(COMMANDS))
+    _add_connection_arguments(parser)
+    parser.add_argument("-s", help="affiche l'ensemble des versions pour chaque composants", action="store_true")
+    _add_show_arguments(parser)
+    _add_selection_arguments(parser)
+    parser.add_argument("-l", type=int,
+                        help="conserve uniquement les n dernière version. Ne fonctionne uniquement qu'avec les "
+                             "versions au format X.Y.Z")
+    _add_older_than_argument(parser)
+    parser.add_argument("--policy",
+                        help="retention policy file (.json, .toml or .yaml) combining keep and delete rules, "
+                             "evaluated in one pass over the repository")
+    _add_deletion_arguments(parser)
+    parser.add_argument("--resume",
+                        help="finish the deletions left by an interrupted run without listing the repository, "
+                             "requires --journal", action="store_true")
+    return parser
+
+
+def _command_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="nexushousekeeper",
+                                     description="Script permetant de faire des opérations sur des composants nexus")
+    commands = parser.add_subparsers(dest="command")
+
+    show = commands.add_parser("show", help="affiche l'ensemble des versions pour chaque composants")
+    show.set_defaults(**dict(DEFAULTS, s=True))
+    _add_connection_arguments(show)
+    _add_show_arguments(show)
+
+    delete = commands.add_parser("delete", help="delete the components matching a version pattern or an exact "
+                                                "version")
+    delete.set_defaults(**DEFAULTS)
+    _add_connection_arguments(delete)
+    _add_selection_arguments(delete, required=True)
+    _add_deletion_arguments(delete)
+
+    keep_last = commands.add_parser("keep-last", help="conserve uniquement les n dernière version")
+    keep_last.set_defaults(**DEFAULTS)
+    keep_last.add_argument("l", metavar="count", type=int, help="number of versions kept for each artifact")
+    _add_older_than_argument(keep_last)
+    _add_connection_arguments(keep_last)
+    _add_deletion_arguments(keep_last)
+
+    policy = commands.add_parser("policy", help="apply a retention policy file combining keep and delete rules")
+    policy.set_defaults(**DEFAULTS)
+    policy.add_argument("policy", metavar="file", help="policy file (.json, .toml or .yaml)")
+    _add_connection_arguments(policy)
+    _add_deletion_arguments(policy)
+
+    resume = commands.add_parser("resume", help="finish the deletions left by an interrupted run, requires "
+                                                "--journal")
+    resume.set_defaults(**dict(DEFAULTS, resume=True))
+    _add_connection_arguments(resume)
+    _add_deletion_arguments(resume)
+    return parser
+
+
+def _legacy_command(args) -> str:
+    """
+    :return: the subcommand matching the flags of the previous versions, in their order of precedence
+    """
+    if args.resume:
+        return 'resume'
+    if args.policy:
+        return 'policy'
     if args.version_match:
-        nexus.delete_all_component_by_version_pattern(version_pattern=args.version_match)
-    elif args.s:
-        nexus.show_all_components(args.no_size)
-    elif args.l:
-        nexus.keep_lasts_versions(args.l)
-    elif args.version and args.groupid:
-        nexus._delete_components_in_array(nexus._get_components_as_list(nexus._search_components, version=args.version,group=args.groupid))
+        return 'delete'
+    if args.s:
+        return 'show'
+    if args.l is not None:
+        return 'keep-last'
+    if args.version:
+        return 'delete'
+    return None
+
+
+def parse_args(argv=None):
+    """
+    :param argv: command line arguments, sys.argv[1:] by default
+    :return: (parser, arguments), arguments.command being the operation to run, None if there is none
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        parser = _command_parser()
+        args = parser.parse_args(argv)
+    else:
+        parser = _legacy_parser()
+        args = parser.parse_args(argv)
+        args.command = _legacy_command(args)
+    if args.offline and not args.index:
+        parser.error("--offline requires --index")
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    return parser, args
+
+
+def main(argv=None):
+    parser, args = parse_args(argv)
+    if args.command is None:
+        return
+    policy = None
+    if args.policy:
+        from .policy import PolicyError, load_policy
+        try:
+            policy = load_policy(args.policy)
+        except (OSError, PolicyError) as error:
+            parser.error(str(error))
+
+    from .componentindex import ComponentIndex
+    from .journal import DeletionJournal
+    from .metrics import Metrics
+    from .multirepo import MultiRepositoryHousekeeper, is_multi_repository
+    from .mvnrepositoryhandler import MvnRepositoryHandler
+    from .sizeresolver import SizeCache
+
+    multi_repository = is_multi_repository(args.r)
+    if multi_repository and args.command == 'show':
+        given = ["--" + option.replace('_', '-') for option in SINGLE_REPOSITORY_SHOW_OPTIONS
+                 if str(getattr(args, option)) != str(DEFAULTS[option])]
+        if given:
+            parser.error("%s only apply to a single repository, not to -r %s" % (", ".join(given), args.r))
+
+    options = dict(dry_run=args.dryrun, prefetch=int(args.prefetch),
+                   index=ComponentIndex(args.index) if args.index else None, refresh_index=not args.offline,
+                   rate=float(args.rate) if args.rate else None, use_script=args.bulk_script,
+                   journal=DeletionJournal(args.journal) if args.journal else None,
+                   size_cache=SizeCache(args.size_cache) if args.size_cache else None,
+                   metrics=Metrics() if args.metrics or args.summary else None, pushdown=not args.no_pushdown)
+    per_host = int(args.per_host) if args.per_host else None
+    timeout = tuple(float(seconds) for seconds in str(args.timeout).split(","))
+    timeout = timeout[0] if len(timeout) == 1 else timeout
+    if multi_repository:
+        nexus = MultiRepositoryHousekeeper(args.u, args.p, args.nexus_url, args.r, int(args.parallel), per_host,
+                                           int(args.retries), timeout, **options)
+    else:
+        nexus = MvnRepositoryHandler(args.u, args.p, args.nexus_url, args.r, parallelism=int(args.parallel),
+                                     per_host=per_host, retries=int(args.retries), repository_format=args.format,
+                                     timeout=timeout, **options)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        _run_command(nexus, args, policy)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        nexus.close()
+        _write_metrics(options['metrics'], args)
+
+
+def _write_metrics(metrics, args):
+    if metrics is None:
+        return
+    if args.metrics:
+        metrics.write_textfile(args.metrics)
+    if args.summary:
+        metrics.write_summary(args.summary)
+
+
+def _run_command(nexus, args, policy=None):
+    from .multirepo import MultiRepositoryHousekeeper
+    if args.command == 'resume':
+        nexus.resume_deletion()
+    elif args.command == 'policy':
+        nexus.apply_policy(policy)
+    elif args.command == 'show':
+        if isinstance(nexus, MultiRepositoryHousekeeper):
+            nexus.show_all_components(args.no_size)
+        else:
+            nexus.show_all_components(args.no_size, int(args.top), args.group_by, int(args.page),
+                                      int(args.page_size), args.export)
+    elif args.command == 'keep-last':
+        nexus.keep_lasts_versions(args.l, args.older_than)
+    elif args.version_match:
+        nexus.delete_all_component_by_version_pattern(version_pattern=args.version_match, group=args.groupid)
     elif args.version:
-        nexus.delete_all_components_by_version(args.version)
+        nexus.delete_all_components_by_version(args.version, group=args.groupid)
 
 
 if __name__ == "__main__":
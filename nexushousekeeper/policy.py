@@ -0,0 +1,304 @@
+"""
+Declarative retention policies.
+
+A policy file (JSON, TOML or YAML) holds a default action and a list of rules, e.g. in YAML::
+
+    default: keep
+    rules:
+      - action: delete              # delete every component of these groups...
+        group: org.example.legacy.*
+      - action: keep                # ...but the 5 highest versions of each artifact
+        last: 5
+        snapshot: false
+      - action: keep                # and snapshots younger than 30 days
+        snapshot: true
+        younger_than_days: 30
+      - action: keep
+        version_match: "2\\\\.0\\\\."
+
+A component is deleted when a delete rule matches it, or no rule and the default is delete, unless a keep rule
+protects it. A keep rule with ``last`` protects the ``last`` highest X.Y.Z versions of each artifact among the
+components it matches, only the newest build of a snapshot, like keep-last. Selectors are ``group``, ``artifact`` and ``version`` (exact or glob), ``version_match`` (regex matched at the
+start of the version like --version-match), ``snapshot``, ``older_than_days`` and ``younger_than_days``, the age being
+the last modification of the assets.
+
+Rules are compiled once into a plan indexed by exact group, artifact, name and version, so each component is only
+checked against the rules that can apply to it, and the listing is classified in one streaming pass: ``last`` rules
+keep a retention.ArtifactTimeline per artifact and a component released by every timeline it was in is emitted right
+away.
+"""
+import datetime
+import fnmatch
+import json
+import os
+import re
+import time
+from functools import lru_cache
+
+from .formats import artifact_key
+from .mavenversion import parse_version
+
+KEEP = 'keep'
+DELETE = 'delete'
+
+_GLOB_CHARACTERS = "*?["
+_SELECTORS = ('group', 'artifact', 'version', 'version_match', 'snapshot', 'older_than_days', 'younger_than_days')
+
+
+class PolicyError(ValueError):
+    """Invalid policy file"""
+
+
+class Rule:
+    """
+    One compiled rule of a policy
+
+    :ivar index: position of the rule in the policy
+    :ivar action: KEEP or DELETE
+    :ivar last: number of versions kept per artifact, None for rules deciding on each component alone
+    """
+
+    def __init__(self, index: int, spec: dict):
+        unknown = set(spec) - set(_SELECTORS) - {'action', 'last'}
+        if unknown:
+            raise PolicyError("rule %d: unknown keys %s" % (index, ", ".join(sorted(unknown))))
+        self.index = index
+        self.action = spec.get('action', DELETE)
+        if self.action not in (KEEP, DELETE):
+            raise PolicyError("rule %d: action must be keep or delete" % index)
+        self.last = spec.get('last')
+        if self.last is not None and (self.action != KEEP or int(self.last) < 0):
+            raise PolicyError("rule %d: last is only allowed on keep rules" % index)
+        self.last = None if self.last is None else int(self.last)
+        self.group = spec.get('group')
+        self.artifact = spec.get('artifact')
+        self.version = spec.get('version')
+        self.version_match = re.compile("^" + spec['version_match']) if spec.get('version_match') else None
+        self.snapshot = spec.get('snapshot')
+        self.older_than = _days(spec.get('older_than_days'))
+        self.younger_than = _days(spec.get('younger_than_days'))
+
+    def matches(self, component: dict, version, age) -> bool:
+        """
+        :param version: the parsed version of the component
+        :param age: age of the component as a timedelta, None if unknown
+        """
+        if not _match(self.group, component.get('group') or ""):
+            return False
+        if not _match(self.artifact, component['name']):
+            return False
+        if not _match(self.version, component['version']):
+            return False
+        if self.version_match is not None and self.version_match.match(component['version']) is None:
+            return False
+        if self.snapshot is not None and version.is_snapshot != self.snapshot:
+            return False
+        if self.older_than is not None and (age is None or age <= self.older_than):
+            return False
+        if self.younger_than is not None and (age is None or age >= self.younger_than):
+            return False
+        return True
+
+    def index_key(self):
+        """
+        :return: the most selective exact selector as ('artifact'|'name'|'version'|'group', value), None for a
+                 generic rule
+        """
+        if _is_exact(self.group) and _is_exact(self.artifact):
+            return 'artifact', self.group + ":" + self.artifact
+        if _is_exact(self.artifact):
+            return 'name', self.artifact
+        if _is_exact(self.version):
+            return 'version', self.version
+        if _is_exact(self.group):
+            return 'group', self.group
+        return None
+
+
+def _days(value):
+    return None if value is None else datetime.timedelta(days=float(value))
+
+
+def _is_exact(value) -> bool:
+    return value is not None and not any(character in value for character in _GLOB_CHARACTERS)
+
+
+def _match(selector, value: str) -> bool:
+    if selector is None:
+        return True
+    if _is_exact(selector):
+        return selector == value
+    return fnmatch.fnmatchcase(value, selector)
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_date(value: str):
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.datetime.fromisoformat(value)
+
+
+def component_date(component: dict):
+    """
+    :return: the last modification of the assets of a component, the snapshot build date if the listing has none
+    """
+    dates = [asset.get('lastModified') or asset.get('blobCreated') for asset in component.get('assets', ())]
+    dates = [_parse_date(date) for date in dates if date]
+    if dates:
+        return max(dates)
+    return _snapshot_date(component['version'])
+
+
+@lru_cache(maxsize=1 << 16)
+def _snapshot_date(version: str):
+    try:
+        date = parse_version(version).date
+    except ValueError:
+        # not a valid snapshot timestamp
+        return None
+    return None if date is None else date.replace(tzinfo=datetime.timezone.utc)
+
+
+class Policy:
+    """
+    A compiled retention policy
+
+    :param rules: rules as dicts, in the policy file order
+    :param default: action of the components no rule selects
+    """
+
+    def __init__(self, rules: list, default: str = KEEP):
+        if default not in (KEEP, DELETE):
+            raise PolicyError("default must be keep or delete")
+        self.default = default
+        self.rules = [Rule(i, spec) for i, spec in enumerate(rules)]
+        self._generic = []
+        self._by_group = {}
+        self._by_artifact = {}
+        self._by_name = {}
+        self._by_version = {}
+        indexes = {'group': self._by_group, 'artifact': self._by_artifact, 'name': self._by_name,
+                   'version': self._by_version}
+        for rule in self.rules:
+            key = rule.index_key()
+            if key is None:
+                self._generic.append(rule)
+            else:
+                indexes[key[0]].setdefault(key[1], []).append(rule)
+        self._needs_age = any(rule.older_than is not None or rule.younger_than is not None for rule in self.rules)
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Policy":
+        if not isinstance(spec, dict) or not isinstance(spec.get('rules', []), list):
+            raise PolicyError("a policy is a mapping with a list of rules")
+        return cls(spec.get('rules', []), spec.get('default', KEEP))
+
+    def candidate_rules(self, component: dict) -> list:
+        """
+        :return: the rules which can match the component, in policy order
+        """
+        candidates = self._generic
+        for index, key in ((self._by_group, component.get('group')),
+                           (self._by_artifact, artifact_key(component)),
+                           (self._by_name, component['name']),
+                           (self._by_version, component['version'])):
+            rules = index.get(key)
+            if rules:
+                candidates = candidates + rules
+        if candidates is not self._generic:
+            candidates.sort(key=lambda rule: rule.index)
+        return candidates
+
+    def evaluate(self, components, now=None, metrics=None):
+        """
+        Classify components in one pass
+        :param components: any iterable of components, consumed once
+        :param now: reference date of the age rules, defaults to the current time
+        :param metrics: optional metrics.Metrics, the classification time of each component is observed
+        :return: a generator of the components to delete, emitted as soon as they are known
+        """
+        # retention imports component_date from this module
+        from .retention import ArtifactTimeline
+
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        timelines = {}  # {(rule index, artifact): ArtifactTimeline}
+        pending = {}  # {component id: [component, number of timelines holding it]}
+        for component in components:
+            start = time.perf_counter()
+            version = parse_version(component['version'])
+            age = None
+            if self._needs_age:
+                date = component_date(component)
+                age = None if date is None else now - date
+            action = None
+            ranked = []
+            for rule in self.candidate_rules(component):
+                if not rule.matches(component, version, age):
+                    continue
+                if rule.last is not None:
+                    ranked.append(rule)
+                elif action != KEEP:
+                    action = rule.action
+            deletable = action == DELETE or (action is None and self.default == DELETE)
+            if metrics is not None:
+                metrics.observe("policy_seconds", time.perf_counter() - start)
+            if not ranked:
+                if deletable:
+                    yield component
+                continue
+
+            # every component matched by a last rule enters its timeline, deletable or not. Versions without a X.Y.Z
+            # short version are never among the last versions.
+            held = [component, 0]
+            if deletable:
+                pending[component['id']] = held
+            key = artifact_key(component)
+            for rule in ranked if version.short_version else ():
+                timeline = timelines.get((rule.index, key))
+                if timeline is None:
+                    timeline = timelines[rule.index, key] = ArtifactTimeline(rule.last)
+                held[1] += 1
+                for released in timeline.add(component, version):
+                    if released is component:
+                        held[1] -= 1
+                        continue
+                    evicted = pending.get(released['id'])
+                    if evicted is not None:
+                        evicted[1] -= 1
+                        if evicted[1] == 0:
+                            del pending[released['id']]
+                            yield released
+            if deletable and held[1] == 0:
+                # not among the last versions of any rule
+                del pending[component['id']]
+                yield component
+        # components still in a timeline are among the last versions of an artifact: kept
+
+
+def load_policy(path: str) -> Policy:
+    """
+    Read a policy file, the format is chosen from the extension: .json, .toml (tomllib, or tomli before python
+    3.11) or .yaml/.yml (requires pyyaml)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding="utf-8") as policy_file:
+            return Policy.from_dict(json.load(policy_file))
+    if extension == '.toml':
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise PolicyError("reading a TOML policy requires python 3.11 or the tomli package")
+        with open(path, 'rb') as policy_file:
+            return Policy.from_dict(tomllib.load(policy_file))
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise PolicyError("reading a YAML policy requires the pyyaml package")
+        with open(path, encoding="utf-8") as policy_file:
+            return Policy.from_dict(yaml.safe_load(policy_file))
+    raise PolicyError("unknown policy format " + path + ", use .json, .toml or .yaml")
@@ -0,0 +1,130 @@
+"""
+Query planner: push the filters of a deletion down to ``v1/search`` instead of listing the whole repository.
+
+A version pattern is a regex the version must start with. Its literal prefix becomes a nexus wildcard, an unescaped
+``.`` standing for any single character (``?``) so ``1.1.`` is searched as ``version=1?1?*``. Several groups (or
+group glob patterns) give one search per group, run in parallel. The server may return more than asked, never less:
+the regex and the groups are applied again afterwards, as a residual filter.
+
+When nothing can be searched, because the pattern has no literal prefix or the format has no such search key, the
+repository is listed and filtered client side as before.
+"""
+import fnmatch
+import re
+
+_SPECIAL = set('.^$*+?{}[]\\|()')
+_QUANTIFIERS = set('*+?{')
+_GLOB = set('*?[')
+
+
+def split_groups(group) -> list:
+    """
+    :param group: group name or glob pattern, or a comma separated list of them, None for every group
+    :return: the list of groups, empty for every group
+    """
+    if not group:
+        return []
+    return [name.strip() for name in group.split(',') if name.strip()]
+
+
+def _has_alternation(pattern: str) -> bool:
+    """
+    :return: True if the pattern has a | outside of any group or character set, its prefix then isn't common
+    """
+    depth = 0
+    in_set = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_set:
+            in_set = char != ']'
+        elif char == '[':
+            in_set = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def version_glob(pattern: str):
+    """
+    :param pattern: regex the version must start with
+    :return: a nexus wildcard matching at least every version the pattern matches, None if it would match any
+             version
+    """
+    if _has_alternation(pattern):
+        return None
+    tokens = []
+    i = 1 if pattern.startswith('^') else 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum() or pattern[i + 1] in _GLOB:
+                # \d, \w... or a character nexus would take for a wildcard
+                break
+            token = pattern[i + 1]
+            i += 2
+        elif char == '.':
+            token = '?'
+            i += 1
+        elif char in _SPECIAL:
+            break
+        else:
+            token = char
+            i += 1
+        if i < len(pattern) and pattern[i] in _QUANTIFIERS:
+            # the token is optional or repeated
+            break
+        tokens.append(token)
+    if not tokens:
+        return None
+    return "".join(tokens) + "*"
+
+
+def plan_queries(repository_format, version_pattern=None, version=None, groups=()) -> list:
+    """
+    :param repository_format: formats.RepositoryFormat of the repository
+    :param version_pattern: regex the version must start with
+    :param version: exact base version, always searched
+    :param groups: groups or group glob patterns, see split_groups
+    :return: the keyword arguments of one v1/search query for each group, empty when the whole repository must be
+             listed
+    """
+    search = {}
+    if version is not None:
+        search['version'] = version
+    elif version_pattern is not None and repository_format.version_key is not None:
+        glob = version_glob(version_pattern)
+        if glob is not None:
+            search['version_glob'] = glob
+    if groups and repository_format.group_key is not None:
+        return [dict(search, group=group) for group in groups]
+    if not search:
+        return []
+    return [search]
+
+
+def residual_filter(components, version_pattern=None, groups=(), unique=False):
+    """
+    Apply the filters again on the components returned by the queries
+    :param unique: drop the components returned twice, when several group patterns overlap
+    :return: a generator of the matching components
+    """
+    version_match = re.compile("^" + version_pattern).match if version_pattern is not None else None
+    seen = set()
+    for component in components:
+        if version_match is not None and version_match(component['version']) is None:
+            continue
+        if groups and not any(fnmatch.fnmatchcase(component.get('group') or "", group) for group in groups):
+            continue
+        if unique:
+            if component['id'] in seen:
+                continue
+            seen.add(component['id'])
+        yield component
@@ -0,0 +1,121 @@
+"""
+Retention planning: which components to keep and which to delete.
+
+Each artifact (``group:name``) has a version timeline updated as the listing pages arrive: the newest build of
+each short version, and a min-heap of the ``last`` highest short versions. A component leaving the timeline
+(an older snapshot build, a version pushed out of the heap) can never come back, it is emitted as a deletion
+candidate right away, while the listing goes on. An update costs O(log n) for n kept versions, and the timeline
+only holds the kept versions.
+"""
+import heapq
+from .formats import artifact_key
+from .mavenversion import parse_version
+from .policy import component_date
+
+
+class ArtifactTimeline:
+    """
+    Versions of one artifact still kept
+
+    :param last: number of short versions kept, None to keep every version (only the newest build of each)
+    """
+
+    def __init__(self, last=None):
+        self.last = last
+        self.newest = {}  # {short version: (MavenVersion, component)}
+        self._heap = []  # [(short version key, -sequence, short version)]
+        self._sequence = 0
+
+    def add(self, component: dict, version) -> list:
+        """
+        :param version: parsed version of the component, with a short version
+        :return: the components no longer kept, the given one included if it isn't kept
+        """
+        short_version = version.short_version
+        known = self.newest.get(short_version)
+        if known is not None:
+            if version > known[0]:
+                # a newer build or a release of a kept version
+                self.newest[short_version] = (version, component)
+                return [known[1]]
+            return [component]
+        self._sequence += 1
+        # between equal versions the first listed is kept, like a stable sort
+        entry = (parse_version(short_version).key, -self._sequence, short_version)
+        if self.last is None or len(self._heap) < self.last:
+            heapq.heappush(self._heap, entry)
+        elif self.last and self._heap[0] < entry:
+            short_version = heapq.heapreplace(self._heap, entry)[2]
+            self.newest[version.short_version] = (version, component)
+            return [self.newest.pop(short_version)[1]]
+        else:
+            return [component]
+        self.newest[short_version] = (version, component)
+        return []
+
+    def kept(self) -> list:
+        """
+        :return: the kept components, newest version first
+        """
+        return [self.newest[short_version][1] for _, _, short_version in sorted(self._heap, reverse=True)]
+
+
+class VersionTimeline:
+    """
+    Timelines of every artifact of a listing, see ArtifactTimeline
+
+    :param last: number of short versions kept per artifact, None for all of them
+    :param older_than: only delete components older than this datetime, None for any age
+    """
+
+    def __init__(self, last=None, older_than=None):
+        self.last = last
+        self.older_than = older_than
+        self.artifacts = {}
+
+    def add(self, component: dict) -> list:
+        """
+        :return: the components which can be deleted now. Versions without a X.Y.Z short version are never kept.
+        """
+        version = parse_version(component["version"])
+        if not version.short_version:
+            released = [component]
+        else:
+            key = artifact_key(component)
+            timeline = self.artifacts.get(key)
+            if timeline is None:
+                timeline = self.artifacts[key] = ArtifactTimeline(self.last)
+            released = timeline.add(component, version)
+        if self.older_than is None:
+            return released
+        return [released_component for released_component in released if self._is_old(released_component)]
+
+    def _is_old(self, component: dict) -> bool:
+        date = component_date(component)
+        return date is not None and date < self.older_than
+
+    def deletable(self, components):
+        """
+        :param components: iterable of components, consumed lazily
+        :return: a generator of the components to delete, emitted while components are still being listed
+        """
+        for component in components:
+            yield from self.add(component)
+
+    def kept(self) -> list:
+        """
+        :return: the kept components, newest first for each artifact
+        """
+        return [component for timeline in self.artifacts.values() for component in timeline.kept()]
+
+
+def last_versions(components, last_version_count: int) -> list:
+    """
+    :param components: iterable of components
+    :param last_version_count: number of versions to keep per artifact
+    :return: the components to keep, newest first for each artifact
+    """
+    timeline = VersionTimeline(last_version_count)
+    for component in components:
+        timeline.add(component)
+    return timeline.kept()
@@ -0,0 +1,190 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import requests
+
+from .httpengine import AdaptiveLimiter
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sizes (
+    asset_id TEXT PRIMARY KEY,
+    validator TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def validator(asset: dict):
+    """
+    :return: what identifies the content of an asset in the listing: its checksum, else its last modification,
+             None if the listing has neither. Nexus derives the ETag of an asset from its sha1, so the checksum
+             validates a cached size like the ETag would, without any request.
+    """
+    checksum = asset.get('checksum') or {}
+    for algorithm in ('sha1', 'sha256', 'md5'):
+        if checksum.get(algorithm):
+            return algorithm + ":" + checksum[algorithm]
+    modified = asset.get('lastModified') or asset.get('blobCreated')
+    return "modified:" + modified if modified else None
+
+
+class SizeCache:
+    """
+    Sizes obtained with HEAD requests, kept across runs in a SQLite file and keyed by asset id and validator: an
+    asset whose content changed is sized again. Writes are committed by batches and on close.
+
+    :param path: database file
+    """
+
+    def __init__(self, path: str, commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self.hits = 0
+        self._pending = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(_CACHE_SCHEMA)
+
+    def get(self, asset: dict):
+        """
+        :return: the cached size of the asset, None if unknown or if the asset changed
+        """
+        key = validator(asset)
+        if key is None or 'id' not in asset:
+            return None
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM sizes WHERE asset_id = ? AND validator = ?",
+                                           (asset['id'], key)).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, asset: dict, size: int) -> None:
+        key = validator(asset)
+        if key is None or 'id' not in asset:
+            return
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO sizes (asset_id, validator, size) VALUES (?, ?, ?)",
+                                     (asset['id'], key, size))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._connection.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+
+class AssetSizeResolver:
+    """
+    Resolve the size in bytes of nexus assets.
+
+    Since Nexus 3.30 every asset returned by ``v1/components`` and ``v1/search`` carries a ``fileSize`` field, so
+    the size is read from the listing itself. Otherwise the size is read from the cache, and a HEAD request on
+    ``downloadUrl`` is only sent for the assets still unknown, through the shared HTTP engine. The number of HEAD
+    requests in flight is adapted to the server with an AdaptiveLimiter: it grows while responses stay fast and is
+    halved on 429/503 or when latency grows. The size obtained that way is written back to the asset as
+    ``fileSize``, so it can be stored in the component index, and to the cache.
+
+    :param engine: HttpEngine used for the HEAD requests
+    :param cache: optional SizeCache
+    """
+
+    def __init__(self, engine, cache=None):
+        self.engine = engine
+        self.cache = cache
+        self.limiter = AdaptiveLimiter(initial=min(4, engine.concurrency), maximum=engine.concurrency)
+        self.head_requests = 0
+
+    @staticmethod
+    def known_size(asset: dict):
+        """
+        :param asset: asset as returned by the nexus listing
+        :return: the size advertised by the listing or None if the server didn't provide it
+        """
+        file_size = asset.get('fileSize')
+        if file_size is None:
+            return None
+        return int(file_size)
+
+    def _split(self, component: dict) -> tuple:
+        size = 0
+        missing = []
+        for asset in component.get('assets', ()):
+            asset_size = self.known_size(asset)
+            if asset_size is None and self.cache is not None:
+                asset_size = self.cache.get(asset)
+                if asset_size is not None:
+                    asset['fileSize'] = asset_size
+            if asset_size is None:
+                missing.append(asset)
+            else:
+                size += asset_size
+        return size, missing
+
+    def resolve(self, component: dict) -> int:
+        """
+        Aggregate size of all assets of a nexus component
+        :param component:
+        :return: the size in bytes
+        """
+        size, missing = self._split(component)
+        return size + sum(self.engine.executor.map(self._head_size, missing))
+
+    async def aresolve(self, component: dict) -> int:
+        """
+        Same as resolve, without blocking the event loop
+        :param component:
+        :return: the size in bytes
+        """
+        size, missing = self._split(component)
+        if missing:
+            size += sum(await asyncio.gather(*[self._ahead_size(asset) for asset in missing]))
+        return size
+
+    async def _ahead_size(self, asset: dict) -> int:
+        await self.limiter.acquire()
+        throttled = self.engine.throttled
+        start = time.monotonic()
+        congested = True
+        self.head_requests += 1
+        try:
+            response = await self.engine.arequest('HEAD', asset['downloadUrl'])
+            congested = self.engine.throttled > throttled or response.status_code in (429, 503)
+        except requests.RequestException:
+            # unreachable once the retries are exhausted: an unknown size, like a failed response
+            return 0
+        finally:
+            self.limiter.release(time.monotonic() - start, congested)
+        return self._store(asset, response)
+
+    def _head_size(self, asset: dict) -> int:
+        self.head_requests += 1
+        try:
+            response = self.engine.request('HEAD', asset['downloadUrl'])
+        except requests.RequestException:
+            return 0
+        return self._store(asset, response)
+
+    def _store(self, asset: dict, response) -> int:
+        """
+        Keep the size answered by a HEAD request. A failed request, once its retries are exhausted, counts for 0
+        and nothing is stored, so the asset is sized again by the next run. So does a request which got no response
+        at all, and the component is deleted anyway.
+        :return: the size in bytes
+        """
+        if not response.ok or 'Content-Length' not in response.headers:
+            return 0
+        size = int(response.headers['Content-Length'])
+        asset['fileSize'] = size
+        if self.cache is not None:
+            self.cache.put(asset, size)
+        return size
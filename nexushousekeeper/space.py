@@ -0,0 +1,161 @@
+"""
+Space actually reclaimed by a deletion, by blob store.
+
+Adding up the size of every asset overestimates the space freed: an asset whose content is already stored for
+another asset of the same blob store is one blob, counted once here, keyed by its blobRef when the listing has one,
+else its checksum. Sidecar assets (.sha1, .md5, .asc...) are reported apart from the primary files they describe.
+Everything is read from the listing while components stream through, without any request: only the keys of the
+blobs already counted are kept, as raw digests.
+"""
+from hurry.filesize import size
+from rich.table import Table
+
+SIDECAR_EXTENSIONS = ('.md5', '.sha1', '.sha256', '.sha512', '.asc')
+UNKNOWN_BLOB_STORE = "unknown"
+
+
+def is_sidecar(asset: dict) -> bool:
+    """
+    :return: True if the asset is a checksum or a signature of another asset
+    """
+    return (asset.get('path') or "").lower().endswith(SIDECAR_EXTENSIONS)
+
+
+def blob_key(asset: dict):
+    """
+    :return: what identifies the blob of an asset in its blob store, None if the listing doesn't tell
+    """
+    if asset.get('blobRef'):
+        return asset['blobRef']
+    checksum = asset.get('checksum') or {}
+    for algorithm in ('sha256', 'sha1', 'md5'):
+        digest = checksum.get(algorithm)
+        if digest:
+            try:
+                return bytes.fromhex(digest)
+            except ValueError:
+                return digest
+    return None
+
+
+class BlobStoreSpace:
+    """Totals of one blob store"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.listed = 0  # sum of the asset sizes, as reported until now
+        self.primary = 0
+        self.sidecar = 0
+        self.duplicates = 0
+
+    @property
+    def reclaimed(self) -> int:
+        return self.primary + self.sidecar
+
+
+class SpaceAccount:
+    """
+    Deduplicated space of the components added, by blob store. Components without assets (planned by a journal)
+    count for their whole size, in the unknown blob store.
+
+    One account can be shared by the deletions of several repositories on one event loop, a blob stored once for
+    two repositories is counted once.
+    """
+
+    def __init__(self):
+        self.stores = {}
+        # {blob store: {blob key: True while reclaimed, False once kept by a component which couldn't be deleted}}
+        self._seen = {}
+
+    def _store(self, name: str) -> BlobStoreSpace:
+        store = self.stores.get(name)
+        if store is None:
+            store = self.stores[name] = BlobStoreSpace(name)
+            self._seen[name] = {}
+        return store
+
+    def add(self, component: dict, comp_size=None) -> int:
+        """
+        :param comp_size: size of the component, used when its assets are unknown
+        :return: the bytes reclaimed by the component that weren't already counted
+        """
+        assets = component.get('assets')
+        if not assets:
+            store = self._store(UNKNOWN_BLOB_STORE)
+            store.listed += comp_size or 0
+            store.primary += comp_size or 0
+            return comp_size or 0
+        reclaimed = 0
+        for asset in assets:
+            asset_size = asset.get('fileSize')
+            if asset_size is None:
+                continue
+            asset_size = int(asset_size)
+            store = self._store(asset.get('blobStoreName') or UNKNOWN_BLOB_STORE)
+            store.listed += asset_size
+            key = blob_key(asset)
+            if key is not None:
+                seen = self._seen[store.name]
+                if key in seen:
+                    store.duplicates += 1
+                    continue
+                seen[key] = True
+            if is_sidecar(asset):
+                store.sidecar += asset_size
+            else:
+                store.primary += asset_size
+            reclaimed += asset_size
+        return reclaimed
+
+    def remove(self, component: dict, comp_size=None) -> int:
+        """
+        Take back a component added before which couldn't be deleted: its blobs are still stored, they are not
+        reclaimed, neither by this component nor by the ones sharing them
+        :param comp_size: size of the component, used when its assets are unknown
+        :return: the bytes no longer reclaimed
+        """
+        assets = component.get('assets')
+        if not assets:
+            store = self._store(UNKNOWN_BLOB_STORE)
+            store.listed -= comp_size or 0
+            store.primary -= comp_size or 0
+            return comp_size or 0
+        removed = 0
+        for asset in assets:
+            asset_size = asset.get('fileSize')
+            if asset_size is None:
+                continue
+            asset_size = int(asset_size)
+            store = self._store(asset.get('blobStoreName') or UNKNOWN_BLOB_STORE)
+            store.listed -= asset_size
+            key = blob_key(asset)
+            if key is not None:
+                seen = self._seen[store.name]
+                if not seen.get(key):
+                    continue
+                seen[key] = False
+            if is_sidecar(asset):
+                store.sidecar -= asset_size
+            else:
+                store.primary -= asset_size
+            removed += asset_size
+        return removed
+
+    @property
+    def listed(self) -> int:
+        return sum(store.listed for store in self.stores.values())
+
+    @property
+    def reclaimed(self) -> int:
+        return sum(store.reclaimed for store in self.stores.values())
+
+    def table(self, title="space by blob store") -> Table:
+        table = Table(show_header=True, header_style="bold magenta", title=title)
+        table.add_column("Blob store", style="dim")
+        for column in ("Listed", "Primary", "Sidecars", "Reclaimed", "Duplicates"):
+            table.add_column(column, justify="right")
+        for name in sorted(self.stores):
+            store = self.stores[name]
+            table.add_row(name, size(store.listed), size(store.primary), size(store.sidecar), size(store.reclaimed),
+                          str(store.duplicates))
+        return table
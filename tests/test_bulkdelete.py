@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+from nexushousekeeper.bulkdelete import BulkDeleter
+from nexushousekeeper.httpengine import HttpEngine
+from nexushousekeeper.mocknexus import MockNexus
+
+
+class BulkDeleterTest(unittest.TestCase):
+
+    def _delete_all(self, nexus, engine, use_script):
+        deleter = BulkDeleter(engine, nexus.rest_url, nexus.repository, use_script, chunk_size=10)
+
+        async def run():
+            await asyncio.gather(*[deleter.add(component, 10) for component in list(nexus.components)])
+            await deleter.flush()
+
+        asyncio.run(run())
+        engine.close()
+        return deleter.report
+
+    def test_delete_must_use_the_script_api_by_chunks(self):
+        # Given
+        with MockNexus(components=25, script_api=True) as nexus:
+
+            # When
+            report = self._delete_all(nexus, HttpEngine(), use_script=True)
+
+            # Then
+            self.assertEqual(25, report.deleted)
+            self.assertEqual(25, report.server_side)
+            self.assertEqual(250, report.bytes_freed)
+            self.assertEqual(3, nexus.counts[("POST", "v1/script/run")])
+            self.assertEqual(0, nexus.counts[("DELETE", "v1/components")])
+            self.assertEqual([], nexus.components)
+
+    def test_delete_must_fallback_to_client_side_and_retry_errors(self):
+        # Given
+        with MockNexus(components=40, error_rate=0.3) as nexus:
+            engine = HttpEngine(retries=20, backoff=0.001)
+
+            # When
+            report = self._delete_all(nexus, engine, use_script=True)
+
+            # Then
+            self.assertEqual(40, report.deleted)
+            self.assertEqual(0, report.server_side)
+            self.assertGreater(engine.retried, 0)
+            self.assertEqual([], nexus.components)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from benchmarks.bench_startup import CLI, HEAVY_MODULES, IMPORT_BUDGET, import_times, relative_import_time
+from nexushousekeeper import nexushousekeeper
+from nexushousekeeper.mocknexus import MockNexus
+
+
+class CliTest(unittest.TestCase):
+
+    def _main(self, nexus, *args):
+        argv = ['nexushousekeeper', '-u', 'user', '-p', 'password', '-r', nexus.repository,
+                '--nexus-url', nexus.rest_url] + list(args)
+        with patch.object(sys, 'argv', argv):
+            nexushousekeeper.main()
+
+    def test_version_and_groupid_must_delete_search_results_only(self):
+        # Given
+        with MockNexus(components=3000, page_size=20) as nexus:
+
+            # When
+            self._main(nexus, '--groupid', 'org.example.g3', '--version', '1.2.3-SNAPSHOT')
+
+            # Then
+            self.assertEqual(100, nexus.counts[("DELETE", "v1/components")])
+            self.assertEqual(0, nexus.counts[("GET", "v1/components")])
+            self.assertFalse([c for c in nexus.components if c['version'].startswith('1.2.3-')])
+
+    def test_keep_last_versions_must_keep_n_versions_per_artifact(self):
+        # Given
+        with MockNexus(components=3000, page_size=100) as nexus:
+
+            # When
+            self._main(nexus, '-l', '2')
+
+            # Then
+            self.assertEqual(2000, len(nexus.components))
+            self.assertEqual({'1.1', '1.2'}, {c['version'][:3] for c in nexus.components})
+
+    def test_dryrun_must_not_delete(self):
+        # Given
+        with MockNexus(components=200, page_size=50) as nexus:
+
+            # When
+            self._main(nexus, '--version-match', '1.0', '--dryrun')
+
+            # Then
+            self.assertEqual(200, len(nexus.components))
+            self.assertEqual(0, nexus.counts[("DELETE", "v1/components")])
+
+    def test_show_must_export_sizes(self):
+        # Given
+        with MockNexus(components=200, asset_size=10, page_size=50) as nexus, \
+                tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sizes.csv')
+
+            # When
+            self._main(nexus, '-s', '--top', '5', '--export', path)
+
+            # Then
+            with open(path) as export:
+                lines = export.read().split()
+            self.assertEqual('artifact-version,size,components', lines[0])
+            self.assertEqual(201, len(lines))
+            self.assertEqual(0, nexus.counts[("HEAD", "asset")])
+
+    def test_subcommands_must_run_the_same_operations(self):
+        # Given
+        with MockNexus(components=3000, page_size=100) as nexus:
+            common = ['-u', 'user', '-p', 'password', '-r', nexus.repository, '--nexus-url', nexus.rest_url]
+
+            # When
+            nexushousekeeper.main(['delete', '--groupid', 'org.example.g3', '--version', '1.2.3-SNAPSHOT'] + common)
+            deleted = nexus.counts[("DELETE", "v1/components")]
+            nexushousekeeper.main(['keep-last', '2'] + common)
+
+            # Then
+            self.assertEqual(100, deleted)
+            self.assertEqual(2000, len(nexus.components))
+            self.assertEqual({'1.0', '1.1'},
+                             {c['version'][:3] for c in nexus.components if c['group'] == 'org.example.g3'})
+
+    def test_legacy_flags_must_map_to_subcommands(self):
+        common = ['-u', 'user', '-p', 'password', '-r', 'maven', '--nexus-url', 'http://nexus/']
+        for flags, command in ((['-s'], 'show'), (['-l', '3'], 'keep-last'), (['-l', '0'], 'keep-last'),
+                               (['--version', '1.0'], 'delete'), (['--version-match', '1', '-s'], 'delete'),
+                               (['--policy', 'p.json'], 'policy'), ([], None)):
+            _, args = nexushousekeeper.parse_args(common + flags)
+            self.assertEqual(command, args.command)
+
+    def test_invalid_numbers_must_be_rejected_by_the_parser(self):
+        common = ['-u', 'user', '-p', 'password', '-r', 'maven', '--nexus-url', 'http://nexus/']
+        for argv in (['keep-last', '3', '--older-than', '7d'] + common, ['keep-last', 'three'] + common,
+                     common + ['-l', '3', '--older-than', 'x']):
+            with self.assertRaises(SystemExit), patch.object(sys, 'stderr'):
+                nexushousekeeper.parse_args(argv)
+
+    def test_single_repository_show_options_must_be_rejected_for_several_repositories(self):
+        common = ['-u', 'user', '-p', 'password', '-r', 'maven-*', '--nexus-url', 'http://nexus/']
+        for argv in (['show', '--top', '5'] + common, ['show', '--group-by', 'artifact'] + common,
+                     common + ['-s', '--export', 'sizes.csv']):
+            with self.assertRaises(SystemExit), patch.object(sys, 'stderr'), \
+                    patch('nexushousekeeper.multirepo.MultiRepositoryHousekeeper') as housekeeper:
+                nexushousekeeper.main(argv)
+            housekeeper.assert_not_called()
+
+    def test_help_must_stay_within_the_import_budget(self):
+        for args in (['-h'], ['delete', '-h'], ['-u', 'user']):
+            # When
+            process = subprocess.run([sys.executable, "-X", "importtime", "-c", CLI] + args,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+
+            # Then
+            modules = import_times(process.stderr)
+            self.assertIn("nexushousekeeper.nexushousekeeper", modules)
+            self.assertFalse([module for module in modules if module.split(".")[0] in HEAVY_MODULES])
+            self.assertNotIn("nexushousekeeper.columns", modules)
+            self.assertLess(relative_import_time(modules), IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
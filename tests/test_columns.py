@@ -0,0 +1,70 @@
+import datetime
+import json
+import os
+import tempfile
+import unittest
+
+from nexushousekeeper.columns import ComponentColumns
+
+NOW = datetime.datetime(2021, 3, 1, tzinfo=datetime.timezone.utc)
+
+
+class ComponentColumnsTest(unittest.TestCase):
+
+    def _columns(self):
+        columns = ComponentColumns(NOW)
+        for i, (group, name, version, modified) in enumerate([
+                ('g1', 'a', '1.0', '2021-02-20T00:00:00.000+00:00'),
+                ('g1', 'a', '1.1-20210101.120000-1', '2020-01-01T00:00:00.000+00:00'),
+                ('g1', 'a', '1.1-20210102.120000-2', '2020-12-01T00:00:00.000+00:00'),
+                ('g2', 'b', '1.0', None)]):
+            assets = [{'lastModified': modified}] if modified else []
+            columns.append({'id': str(i), 'group': group, 'name': name, 'version': version, 'assets': assets},
+                           10 * (i + 1))
+        return columns
+
+    def test_totals_must_group_sizes_and_counts(self):
+        # Given
+        columns = self._columns()
+
+        # Then
+        self.assertEqual(100, columns.total_size)
+        self.assertEqual([('g1:a', 60, 3), ('g2:b', 40, 1)], columns.totals('artifact'))
+        self.assertEqual([('1.0', 50, 2), ('1.1-SNAPSHOT', 50, 2)], columns.totals('version'))
+        self.assertEqual([('g1:a:1.0', 10, 1), ('g1:a:1.1-SNAPSHOT', 50, 2), ('g2:b:1.0', 40, 1)],
+                         columns.totals('artifact-version'))
+        self.assertEqual([('< 30 days', 10, 1), ('90-365 days', 30, 1), ('> 1 year', 20, 1), ('unknown', 40, 1)],
+                         columns.totals('age'))
+        self.assertEqual({'g1:a': {'1.0': 10, '1.1-SNAPSHOT': 50}, 'g2:b': {'1.0': 40}},
+                         columns.nested('artifact', 'version'))
+
+    def test_top_and_page_must_sort_by_size(self):
+        # Given
+        columns = self._columns()
+
+        # Then
+        self.assertEqual([('g1:a:1.1-SNAPSHOT', 50, 2)], columns.top('artifact-version', 1))
+        self.assertEqual([('g2:b:1.0', 40, 1), ('g1:a:1.0', 10, 1)], columns.page('artifact-version', 2, 1) +
+                         columns.page('artifact-version', 3, 1))
+
+    def test_export_must_write_csv_and_json(self):
+        # Given
+        columns = self._columns()
+
+        with tempfile.TemporaryDirectory() as directory:
+            # When
+            csv_path = os.path.join(directory, 'sizes.csv')
+            json_path = os.path.join(directory, 'sizes.json')
+            columns.export(csv_path, 'group')
+            columns.export(json_path, 'group')
+
+            # Then
+            with open(csv_path) as csv_file:
+                self.assertEqual(['group,size,components', 'g1,60,3', 'g2,40,1'], csv_file.read().split())
+            with open(json_path) as json_file:
+                self.assertEqual([{'group': 'g1', 'size': 60, 'components': 3},
+                                  {'group': 'g2', 'size': 40, 'components': 1}], json.load(json_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
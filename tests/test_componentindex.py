@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from nexushousekeeper.componentindex import ComponentIndex
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+
+
+class ComponentIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "index.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _handler(self, nexus, refresh_index=True):
+        return MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, prefetch=0,
+                                    index=ComponentIndex(self.path), refresh_index=refresh_index)
+
+    def test_refresh_must_forget_components_deleted_on_the_server(self):
+        # Given
+        with MockNexus(components=25, page_size=10) as nexus:
+            handler = self._handler(nexus)
+            list(handler._iter_components(handler._get_all_components))
+            handler.close()
+            nexus.delete('c3')
+
+            # When
+            handler = self._handler(nexus)
+            list(handler._iter_components(handler._get_all_components))
+            handler.close()
+
+            # Then
+            handler = self._handler(nexus, refresh_index=False)
+            nexus.reset_counts()
+            ids = [c['id'] for c in handler._iter_components(handler._get_all_components)]
+            handler.close()
+            self.assertEqual(24, len(ids))
+            self.assertNotIn('c3', ids)
+            self.assertEqual(0, nexus.total_requests)
+
+    def test_search_refresh_must_not_shield_components_from_the_next_complete_refresh(self):
+        # Given c3 seen by a search, then deleted outside of the tool
+        with MockNexus(components=25, page_size=10) as nexus:
+            index = ComponentIndex(self.path)
+            list(index.refresh(nexus.repository, [list(nexus.components)]))
+            list(index.refresh(nexus.repository, [[c for c in nexus.components if c['id'] == 'c3']], complete=False))
+            nexus.delete('c3')
+
+            # When
+            list(index.refresh(nexus.repository, [list(nexus.components)]))
+
+            # Then
+            ids = [c['id'] for page in index.iter_component_pages(nexus.repository) for c in page]
+            index.close()
+            self.assertEqual(24, len(ids))
+            self.assertNotIn('c3', ids)
+
+    def test_sizes_resolved_with_head_must_not_be_requested_again(self):
+        # Given
+        with MockNexus(components=5, assets_per_component=2, asset_size=10, with_file_size=False) as nexus:
+            handler = self._handler(nexus)
+            handler.show_all_components()
+            handler.close()
+            nexus.reset_counts()
+
+            # When
+            handler = self._handler(nexus)
+            handler.show_all_components()
+            handler.close()
+
+            # Then
+            self.assertEqual(100, handler.total_size)
+            self.assertEqual(0, nexus.counts[("HEAD", "asset")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import socket
+import unittest
+
+import requests
+
+from nexushousekeeper.httpengine import AdaptiveLimiter, HttpEngine, run_bounded
+
+
+class HttpEngineTest(unittest.TestCase):
+
+    def test_stalled_request_must_time_out_and_be_retried(self):
+        # Given a server accepting connections but never answering
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        self.addCleanup(server.close)
+        url = "http://127.0.0.1:%d/stalled" % server.getsockname()[1]
+        engine = HttpEngine(retries=2, backoff=0.01, timeout=(1, 0.2))
+        self.addCleanup(engine.close)
+
+        # When / Then
+        with self.assertRaises(requests.Timeout):
+            asyncio.run(engine.arequest("GET", url))
+        self.assertEqual(2, engine.retried)
+
+
+class RunBoundedTest(unittest.TestCase):
+
+    def test_run_bounded_must_never_exceed_the_limit(self):
+        # Given
+        in_flight = 0
+        peak = 0
+
+        async def handle(item):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001 * (item % 3))
+            in_flight -= 1
+
+        # When
+        handled = asyncio.run(run_bounded(iter(range(100)), handle, 7))
+
+        # Then
+        self.assertEqual(100, handled)
+        self.assertEqual(7, peak)
+
+    def test_run_bounded_must_raise_the_first_error(self):
+        # Given
+        async def handle(item):
+            if item == 5:
+                raise ValueError("boom")
+
+        # When / Then
+        with self.assertRaises(ValueError):
+            asyncio.run(run_bounded(range(20), handle, 4))
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+
+    def test_limit_must_grow_additively_and_halve_on_congestion(self):
+        # Given
+        limiter = AdaptiveLimiter(initial=4, maximum=10)
+
+        async def scenario():
+            for _ in range(4 + 5):
+                await limiter.acquire()
+                limiter.release(0.01)
+            grown = limiter.limit
+            for _ in range(3):
+                await limiter.acquire()
+            limiter.release(0.01, congested=True)
+            limiter.release(0.01, congested=True)
+            limiter.release(1.0)
+            return grown
+
+        # When
+        grown = asyncio.run(scenario())
+
+        # Then
+        self.assertEqual(6, grown)
+        self.assertEqual(3, limiter.limit)
+        self.assertEqual(1, limiter.decreases)
+
+    def test_acquire_must_wait_for_a_free_slot(self):
+        # Given
+        limiter = AdaptiveLimiter(initial=2, maximum=2)
+        in_flight = 0
+        peak = 0
+
+        async def request():
+            nonlocal in_flight, peak
+            await limiter.acquire()
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            limiter.release(0.001)
+
+        async def scenario():
+            await asyncio.gather(*[request() for _ in range(20)])
+
+        # When
+        asyncio.run(scenario())
+
+        # Then
+        self.assertEqual(2, peak)
+        self.assertEqual(0, limiter.in_flight)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from nexushousekeeper.journal import DeletionJournal
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+
+
+class DeletionJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_remaining_must_skip_deleted_components_and_cut_lines(self):
+        # Given
+        journal = DeletionJournal(self.path)
+        for i in range(3):
+            journal.planned({'id': str(i), 'group': 'kawamind', 'name': 'module1', 'version': '1.%d' % i}, 10)
+        journal.deleted('1')
+        journal.failed('2', 'boom')
+        journal.close()
+        with open(self.path, "a") as f:
+            f.write('{"op": "do')
+
+        # When
+        remaining = DeletionJournal.remaining(self.path)
+
+        # Then
+        self.assertEqual(['0', '2'], [component['id'] for component in remaining])
+        self.assertEqual(10, remaining[0]['size'])
+
+    def test_resume_must_delete_remaining_components_without_listing(self):
+        # Given
+        with MockNexus(components=10) as nexus:
+            journal = DeletionJournal(self.path)
+            for component in nexus.components[:6]:
+                journal.planned(component, 30)
+            for component in nexus.components[:2]:
+                journal.deleted(component['id'])
+                nexus.delete(component['id'])
+            journal.close()
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                           journal=DeletionJournal(self.path))
+
+            # When
+            handler.resume_deletion()
+            handler.close()
+
+            # Then
+            self.assertEqual(0, nexus.counts[("GET", "v1/components")])
+            self.assertEqual(4, nexus.counts[("DELETE", "v1/components")])
+            self.assertEqual(['c%d' % i for i in range(6, 10)], [c['id'] for c in nexus.components])
+            self.assertEqual([], DeletionJournal.remaining(self.path))
+
+    def test_whole_plan_must_be_journaled_before_deleting(self):
+        # Given
+        with MockNexus(components=30) as nexus:
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                           journal=DeletionJournal(self.path))
+
+            # When
+            planned = list(handler._plan(version_pattern="1.0.[0-4]"))
+            handler.close()
+
+            # Then
+            self.assertEqual(0, nexus.counts[("DELETE", "v1/components")])
+            remaining = DeletionJournal.remaining(self.path)
+            self.assertEqual([c['id'] for c in planned], [c['id'] for c in remaining])
+            self.assertEqual([3 * 1024] * len(planned), [c['size'] for c in remaining])
+
+    def test_rerun_must_skip_components_already_deleted(self):
+        # Given
+        with MockNexus(components=10) as nexus:
+            journal = DeletionJournal(self.path)
+            for component in nexus.components[:4]:
+                journal.planned(component, 30)
+                journal.deleted(component['id'])
+            journal.close()
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                           journal=DeletionJournal(self.path))
+
+            # When
+            report = handler.delete_all_components()
+            handler.close()
+
+            # Then
+            self.assertEqual(6, nexus.counts[("DELETE", "v1/components")])
+            self.assertEqual(6, report.deleted)
+            self.assertEqual(['c%d' % i for i in range(4)], [c['id'] for c in nexus.components])
+
+    def test_unreachable_asset_must_not_abort_the_deletion(self):
+        # Given an asset without fileSize whose HEAD request can't connect
+        with MockNexus(components=10) as nexus:
+            components = list(nexus.components)
+            asset = dict(components[3]['assets'][0], downloadUrl='http://127.0.0.1:1/unreachable.jar')
+            del asset['fileSize']
+            components[3] = dict(components[3], assets=[asset] + components[3]['assets'][1:])
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, retries=0,
+                                           journal=DeletionJournal(self.path))
+
+            # When
+            report = handler._delete_components_in_array(components)
+            handler.close()
+
+            # Then
+            self.assertEqual(10, report.deleted)
+            self.assertEqual([], nexus.components)
+            self.assertEqual([], DeletionJournal.remaining(self.path))
+
+    def test_failed_deletions_must_be_journaled_instead_of_aborting(self):
+        # Given
+        with MockNexus(components=30, error_rate=0.6) as nexus:
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, retries=0,
+                                           journal=DeletionJournal(self.path))
+
+            # When
+            handler._delete_components_in_array(list(nexus.components))
+            handler.close()
+
+            # Then
+            with open(self.path) as f:
+                self.assertIn('"op": "fail"', f.read())
+            self.assertEqual(sorted(c['id'] for c in nexus.components),
+                             sorted(c['id'] for c in DeletionJournal.remaining(self.path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
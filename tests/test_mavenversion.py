@@ -0,0 +1,37 @@
+import unittest
+from nexushousekeeper.mavenversion import parse_version, sort_key
+
+
+class MavenVersionTest(unittest.TestCase):
+
+    def test_versions_must_sort_like_maven_comparable_version(self):
+        # Given
+        expected = ['1.0-alpha-1', '1.0-beta', '1.0-m2', '1.0-rc1', '1.0-SNAPSHOT', '1.0', '1.0-sp1', '1.0.1',
+                    '2.0-20201208.121756-1', '2.0-20201208.134457-2', '2.0', '2.0.a', '2-1', '2.0.2', '2.9', '2.10']
+
+        # When
+        result = sorted(reversed(expected), key=sort_key)
+
+        # Then
+        self.assertEqual(expected, result)
+
+    def test_equivalent_versions_must_be_equal(self):
+        self.assertEqual(parse_version('1'), parse_version('1.0.0'))
+        self.assertEqual(parse_version('1.0-ga'), parse_version('1.0-final'))
+        self.assertEqual(parse_version('1.0-cr1'), parse_version('1.0-rc1'))
+        self.assertEqual(parse_version('2.0.a'), parse_version('2-a'))
+
+    def test_parse_version_must_split_timestamped_snapshot(self):
+        # When
+        version = parse_version('2.1.1-20201208.134457-2')
+
+        # Then
+        self.assertEqual('2.1.1-SNAPSHOT', version.base_version)
+        self.assertEqual('2.1.1', version.short_version)
+        self.assertEqual('20201208.134457', version.timestamp)
+        self.assertEqual(2, version.build)
+        self.assertTrue(version.is_snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
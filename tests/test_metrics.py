@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from nexushousekeeper import nexushousekeeper
+from nexushousekeeper.metrics import Metrics, endpoint_of
+from nexushousekeeper.mocknexus import MockNexus
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_endpoint_of_must_drop_ids(self):
+        self.assertEqual("v1/components", endpoint_of("http://nexus/service/rest/v1/components/abc?x=1"))
+        self.assertEqual("v1/script/run", endpoint_of("http://nexus/service/rest/v1/script/purge/run"))
+        self.assertEqual("asset", endpoint_of("http://nexus/repository/maven/a.jar"))
+
+    def test_textfile_must_use_prometheus_format(self):
+        # Given
+        metrics = Metrics()
+        metrics.request_started()
+        metrics.request_done("GET", "http://nexus/service/rest/v1/search", 200, 0.02)
+        metrics.inc("bytes_freed_total", 1024, repository="maven")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'nexus.prom')
+
+            # When
+            metrics.write_textfile(path)
+
+            # Then
+            with open(path) as textfile:
+                lines = textfile.read().splitlines()
+        self.assertIn('nexushousekeeper_bytes_freed_total{repository="maven"} 1024', lines)
+        self.assertIn('nexushousekeeper_requests_total{endpoint="v1/search",method="GET",status="200"} 1', lines)
+        self.assertIn('nexushousekeeper_request_seconds_bucket{endpoint="v1/search",le="0.025"} 1', lines)
+        self.assertIn('nexushousekeeper_request_seconds_bucket{endpoint="v1/search",le="0.01"} 0', lines)
+        self.assertIn('nexushousekeeper_in_flight_max 1', lines)
+        self.assertNotIn('# EOF', lines)
+
+    def test_summary_must_key_metrics_by_name_and_labels(self):
+        # Given
+        metrics = Metrics()
+        metrics.inc("deleted_total", 3, repository="maven-a", dry_run="false")
+        metrics.set_gauge("limit", 8, host="nexus-a")
+        metrics.set_gauge("limit", 4, host="nexus-b")
+        metrics.observe("page_seconds", 0.02, repository="maven-a")
+
+        # When
+        summary = metrics.summary()
+
+        # Then
+        self.assertEqual({'deleted_total{dry_run="false",repository="maven-a"}': 3}, summary['counters'])
+        self.assertEqual({'limit{host="nexus-a"}': 8, 'limit{host="nexus-b"}': 4}, summary['gauges'])
+        self.assertEqual(['page_seconds{repository="maven-a"}'], list(summary['latencies']))
+
+    def test_cli_must_write_metrics_summary_and_profile(self):
+        # Given
+        with MockNexus(components=100, page_size=20, error_rate=0.1) as nexus, \
+                tempfile.TemporaryDirectory() as directory:
+            paths = [os.path.join(directory, name) for name in ('nexus.prom', 'summary.json', 'run.pstats')]
+            argv = ['nexushousekeeper', '-u', 'user', '-p', 'password', '-r', nexus.repository,
+                    '--nexus-url', nexus.rest_url, '--version-match', '1.0.1', '--retries', '20',
+                    '--metrics', paths[0], '--summary', paths[1], '--profile', paths[2]]
+
+            # When
+            with patch.object(sys, 'argv', argv):
+                nexushousekeeper.main()
+
+            # Then
+            with open(paths[1]) as summary_file:
+                summary = json.load(summary_file)
+            self.assertEqual(10, summary['requests']['DELETE v1/components']['204'])
+            self.assertEqual(10, summary['counters']['deleted_total{dry_run="false",repository="maven-repo"}'])
+            self.assertEqual(nexus.counts[("GET", "error")] + nexus.counts[("DELETE", "error")],
+                             summary['counters'].get('retries_total', 0))
+            self.assertEqual(1, summary['latencies']['page_seconds']['count'])
+            self.assertTrue(os.path.getsize(paths[0]) > 0)
+            self.assertTrue(os.path.getsize(paths[2]) > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+from nexushousekeeper import nexushousekeeper
+from nexushousekeeper.formats import artifact_key, get_format
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.multirepo import MultiRepositoryHousekeeper, expand_repositories, is_multi_repository
+
+REPOSITORIES = [{'name': 'maven-releases', 'format': 'maven2', 'type': 'hosted'},
+                {'name': 'maven-snapshots', 'format': 'maven2', 'type': 'hosted'},
+                {'name': 'maven-public', 'format': 'maven2', 'type': 'group'},
+                {'name': 'npm-private', 'format': 'npm', 'type': 'hosted'}]
+
+
+class MultiRepositoryTest(unittest.TestCase):
+
+    def test_expand_repositories_must_match_patterns_and_names(self):
+        # When
+        repositories = expand_repositories('maven-*, npm-private,maven-releases', REPOSITORIES)
+
+        # Then
+        self.assertEqual([('maven-releases', 'maven2'), ('maven-snapshots', 'maven2'), ('npm-private', 'npm')],
+                         repositories)
+
+    def test_expand_repositories_must_reject_unknown_names(self):
+        with self.assertRaises(ValueError):
+            expand_repositories('maven-releases,unknown', REPOSITORIES)
+
+    def test_is_multi_repository(self):
+        self.assertFalse(is_multi_repository('maven-releases'))
+        self.assertTrue(is_multi_repository('maven-*'))
+        self.assertTrue(is_multi_repository('a,b'))
+
+    def test_formats_must_map_search_keys(self):
+        self.assertEqual({'maven.groupId': 'org.example', 'maven.baseVersion': '1.0'},
+                         get_format('maven2').search_params(group='org.example', version='1.0'))
+        self.assertEqual({'docker.imageName': 'app', 'docker.imageTag': 'latest'},
+                         get_format('docker').search_params(name='app', version='latest'))
+        self.assertEqual({'version': '1.0'}, get_format('pypi').search_params(version='1.0'))
+        with self.assertRaises(ValueError):
+            get_format('docker').search_params(group='library')
+        self.assertEqual('app', artifact_key({'group': None, 'name': 'app'}))
+
+    def test_repositories_must_be_processed_with_one_shared_engine(self):
+        # Given
+        with MockNexus(components=300, page_size=20, repositories=['maven-a', 'maven-b', 'other']) as nexus:
+            housekeeper = MultiRepositoryHousekeeper('user', 'password', nexus.rest_url, 'maven-*', parallelism=4)
+            try:
+                # When
+                reports = housekeeper.delete_all_component_by_version_pattern('1.0.1')
+            finally:
+                housekeeper.close()
+
+            # Then
+            self.assertEqual(['maven-a', 'maven-b'], list(reports))
+            self.assertEqual([30, 30], [report.deleted for report in reports.values()])
+            self.assertEqual({'maven-a': 270, 'maven-b': 270, 'other': 300},
+                             {repository: len([c for c in nexus.components if c['repository'] == repository])
+                              for repository in nexus.repositories})
+            self.assertTrue(all(handler.engine is housekeeper.engine for handler in housekeeper.handlers))
+
+    def test_cli_must_accept_a_list_of_repositories(self):
+        # Given
+        with MockNexus(components=100, page_size=50, repositories=['maven-a', 'maven-b']) as nexus:
+            argv = ['nexushousekeeper', '-u', 'user', '-p', 'password', '-r', 'maven-a,maven-b',
+                    '--nexus-url', nexus.rest_url, '--version-match', '1.0.1']
+
+            # When
+            with patch.object(sys, 'argv', argv):
+                nexushousekeeper.main()
+
+            # Then
+            self.assertEqual(180, len(nexus.components))
+            self.assertEqual(1, nexus.counts[("GET", "v1/repositories")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
+import asyncio
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
+from nexushousekeeper import retention
 from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+from nexushousekeeper.mocknexus import MockNexus
 
 
 class NexusHouseKeeperTest(unittest.TestCase):
@@ -24,7 +27,7 @@ class NexusHouseKeeperTest(unittest.TestCase):
     def test_regex_should_match_release_version(self):
         # Given
         nexus_house_keeper = MvnRepositoryHandler('user', 'password', 'mock://testuri', 'maven-repo')
-        nexus_house_keeper._components_size = MagicMock(return_value=10)
+        nexus_house_keeper._components_size_async = AsyncMock(return_value=10)
 
         # When
         aggregates_components, total_size = nexus_house_keeper.aggregates_components(self.components, True)
@@ -40,7 +43,7 @@ class NexusHouseKeeperTest(unittest.TestCase):
     def test_aggregates_version_should_produce_dict_with_versions_and_size(self):
         # Given
         nexus_house_keeper = MvnRepositoryHandler('user', 'password', 'mock://testuri', 'maven-repo')
-        nexus_house_keeper._components_size = MagicMock(return_value=10)
+        nexus_house_keeper._components_size_async = AsyncMock(return_value=10)
 
         # When
         aggregates_versions, total_size = nexus_house_keeper.aggregates_versions(self.components, True)
@@ -69,7 +72,7 @@ class NexusHouseKeeperTest(unittest.TestCase):
         nexus_house_keeper = MvnRepositoryHandler('user', 'password', 'mock://testuri', 'maven-repo')
 
         # When
-        result = nexus_house_keeper._filter_components_by_version_pattern(components, pattern_to_delete)
+        result = list(nexus_house_keeper._filter_components_by_version_pattern(components, pattern_to_delete))
         # Then
         self.assertEqual(expected, result)
 
@@ -110,7 +113,7 @@ class NexusHouseKeeperTest(unittest.TestCase):
         # Then
         self.assertListEqual(expected, result)
 
-    def test_get_most_recent_artefact_for_version(self):
+    def test_version_timeline_must_keep_the_most_recent_artefact_for_version(self):
         # Given
         components = [{'name': 'module1', 'version': '2.0-20201208.121756-1', 'id': '1', 'group': 'kawamind'},
                       {'name': 'module1', 'version': '2.1.1-20201208.121756-1', 'id': '2', 'group': 'kawamind'},
@@ -132,17 +135,83 @@ class NexusHouseKeeperTest(unittest.TestCase):
                     {'name': 'module2', 'version': '2.5', 'id': '8', 'group': 'kawamind'}
                     ]
 
-        nexus_house_keeper2 = MvnRepositoryHandler('user', 'password', 'mock://testuri', 'maven-repo')
+        timeline = retention.VersionTimeline()
         # When
         for comp in components:
-            nexus_house_keeper2._get_most_recent_artefact_for_version(comp)
+            timeline.add(comp)
         # Then
-        print(str(nexus_house_keeper2.versions_cache.items()) + "\n")
-        values = list(map(lambda x: x["component"], nexus_house_keeper2.versions_cache.values()))
+        values = timeline.kept()
         print(values)
         for exp in expected:
             self.assertTrue(exp in values, str(exp) + " n'est pas présent dans " + str(values))
 
+    def test_iter_component_pages_must_stream_one_request_per_page(self):
+        # Given
+        with MockNexus(components=25, page_size=10) as nexus:
+            nexus_house_keeper = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                                      prefetch=0)
+
+            # When
+            pages = nexus_house_keeper._iter_component_pages(nexus_house_keeper._get_all_components)
+            first_page = next(pages)
+
+            # Then
+            self.assertEqual(10, len(first_page))
+            self.assertEqual(1, nexus.total_requests)
+            self.assertEqual([10, 5], [len(page) for page in pages])
+            self.assertEqual(3, nexus.total_requests)
+
+    def test_iter_component_pages_with_prefetch_must_return_every_page_in_order(self):
+        # Given
+        with MockNexus(components=95, page_size=10) as nexus:
+            nexus_house_keeper = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                                      prefetch=3)
+
+            # When
+            pages = list(nexus_house_keeper._iter_component_pages(nexus_house_keeper._get_all_components))
+
+            # Then
+            self.assertEqual(10, len(pages))
+            self.assertEqual(['c%d' % i for i in range(95)], [c['id'] for page in pages for c in page])
+            self.assertEqual(10, nexus.total_requests)
+
+    def test_delete_components_in_array_must_delete_each_component_over_http(self):
+        # Given
+        with MockNexus(components=30, page_size=10, asset_size=10) as nexus:
+            nexus_house_keeper = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                                      parallelism=4)
+
+            # When
+            nexus_house_keeper.delete_all_components()
+            nexus_house_keeper.close()
+
+            # Then
+            self.assertEqual(30, nexus.counts[("DELETE", "v1/components")])
+            self.assertEqual(0, nexus.counts[("HEAD", "asset")])
+            self.assertEqual([], nexus.components)
+
+    def test_async_api_must_run_in_the_caller_event_loop(self):
+        # Given
+        with MockNexus(components=30, page_size=10, asset_size=10) as nexus:
+            nexus_house_keeper = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository,
+                                                      parallelism=4, show_progress=False)
+
+            async def service():
+                columns = await nexus_house_keeper.report()
+                report = await nexus_house_keeper.delete(nexus_house_keeper.plan(version_pattern='1.0.[12]'))
+                with self.assertRaises(RuntimeError):
+                    nexus_house_keeper.delete_all_components()
+                return columns, report
+
+            # When
+            columns, report = asyncio.run(service())
+            nexus_house_keeper.close()
+
+            # Then
+            self.assertEqual(30 * 3 * 10, columns.total_size)
+            self.assertEqual(6, report.deleted)
+            self.assertEqual(24, len(nexus.components))
+
 
 if __name__ == '__main__':
     unittest.main()
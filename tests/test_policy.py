@@ -0,0 +1,135 @@
+import datetime
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from nexushousekeeper import nexushousekeeper
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.policy import Policy, PolicyError, load_policy
+
+NOW = datetime.datetime(2021, 3, 1, tzinfo=datetime.timezone.utc)
+
+
+def _component(i, version, group='org.example', name='module1', modified='2021-01-01T00:00:00.000+00:00'):
+    return {'id': str(i), 'group': group, 'name': name, 'version': version,
+            'assets': [{'lastModified': modified}]}
+
+
+class PolicyTest(unittest.TestCase):
+
+    def test_keep_last_must_keep_the_highest_versions_of_each_artifact(self):
+        # Given
+        policy = Policy([{'action': 'keep', 'last': 2}], default='delete')
+        components = [_component(i, v, name=name) for i, (v, name) in enumerate(
+            [('2.9', 'a'), ('2.10', 'a'), ('1.0', 'b'), ('2.8', 'a'), ('2.11', 'a')])]
+
+        # When
+        deleted = [c['version'] + c['name'] for c in policy.evaluate(components, NOW)]
+
+        # Then
+        self.assertEqual(['2.8a', '2.9a'], deleted)
+
+    def test_keep_last_must_count_the_builds_of_a_snapshot_as_one_version(self):
+        # Given
+        policy = Policy([{'action': 'keep', 'last': 2}], default='delete')
+        versions = ['1.0', '1.1'] + ['2.0-20210101.1200%02d-%d' % (i, i) for i in range(1, 6)]
+        components = [_component(i, version) for i, version in enumerate(versions)]
+
+        # When
+        deleted = [c['version'] for c in policy.evaluate(components, NOW)]
+
+        # Then the newest build of 2.0 and the highest release are kept, like keep-last
+        self.assertEqual(['1.0'] + versions[2:6], sorted(deleted))
+
+    def test_keep_rules_must_protect_from_delete_rules(self):
+        # Given
+        policy = Policy([{'action': 'delete', 'group': 'org.old*'},
+                         {'action': 'keep', 'version_match': '2\\.0'},
+                         {'action': 'keep', 'snapshot': True, 'younger_than_days': 30}])
+        components = [_component(0, '1.0', group='org.old'),
+                      _component(1, '2.0.1', group='org.old'),
+                      _component(2, '1.0', group='org.new'),
+                      _component(3, '1.1-SNAPSHOT', group='org.oldies', modified='2021-02-20T00:00:00.000Z'),
+                      _component(4, '1.2-SNAPSHOT', group='org.oldies')]
+
+        # When
+        deleted = [c['id'] for c in policy.evaluate(components, NOW)]
+
+        # Then
+        self.assertEqual(['0', '4'], deleted)
+
+    def test_exact_selectors_must_index_rules(self):
+        # Given
+        policy = Policy([{'action': 'delete', 'group': 'org.a'}, {'action': 'delete', 'artifact': 'x'},
+                         {'action': 'delete', 'group': 'org.b', 'artifact': 'y'},
+                         {'action': 'delete', 'version': '1.0'},
+                         {'action': 'keep', 'group': 'org.*'}])
+
+        # When
+        rules = policy.candidate_rules(_component(0, '1.0', group='org.b', name='x'))
+
+        # Then
+        self.assertEqual([1, 3, 4], [rule.index for rule in rules])
+
+    def test_components_must_be_emitted_while_listing(self):
+        # Given
+        policy = Policy([{'action': 'keep', 'last': 1}], default='delete')
+        listed = []
+
+        def listing():
+            for i in range(3):
+                listed.append(i)
+                yield _component(i, '1.%d' % i)
+
+        # When
+        first = next(policy.evaluate(listing(), NOW))
+
+        # Then
+        self.assertEqual('0', first['id'])
+        self.assertEqual([0, 1], listed)
+
+    def test_invalid_rules_must_be_rejected(self):
+        with self.assertRaises(PolicyError):
+            Policy([{'action': 'delete', 'last': 2}])
+        with self.assertRaises(PolicyError):
+            Policy([{'action': 'keep', 'grup': 'org.example'}])
+
+    def test_load_policy_must_read_json_and_toml(self):
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'policy.json')
+            with open(json_path, 'w') as policy_file:
+                json.dump({'default': 'delete', 'rules': [{'action': 'keep', 'last': 3}]}, policy_file)
+            toml_path = os.path.join(directory, 'policy.toml')
+            with open(toml_path, 'w') as policy_file:
+                policy_file.write('default = "delete"\n[[rules]]\naction = "keep"\nlast = 3\n')
+
+            for path in (json_path, toml_path):
+                policy = load_policy(path)
+                self.assertEqual('delete', policy.default)
+                self.assertEqual(3, policy.rules[0].last)
+
+    def test_cli_must_apply_a_policy_in_one_listing(self):
+        # Given
+        with MockNexus(components=3000, page_size=100) as nexus, tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'policy.json')
+            with open(path, 'w') as policy_file:
+                json.dump({'default': 'delete', 'rules': [{'action': 'keep', 'last': 2},
+                                                          {'action': 'keep', 'group': 'org.example.g0'}]},
+                          policy_file)
+            argv = ['nexushousekeeper', '-u', 'user', '-p', 'password', '-r', nexus.repository,
+                    '--nexus-url', nexus.rest_url, '--policy', path]
+
+            # When
+            with patch.object(sys, 'argv', argv):
+                nexushousekeeper.main()
+
+            # Then
+            self.assertEqual(2100, len(nexus.components))
+            self.assertEqual(30, nexus.counts[("GET", "v1/components")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from nexushousekeeper.componentindex import ComponentIndex
+from nexushousekeeper.formats import get_format
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+from nexushousekeeper.queryplan import plan_queries, residual_filter, split_groups, version_glob
+
+
+class QueryPlanTest(unittest.TestCase):
+
+    def test_version_glob_must_keep_the_literal_prefix(self):
+        self.assertEqual('1?1?*', version_glob('1.1.'))
+        self.assertEqual('1.1.*', version_glob(r'1\.1\.'))
+        self.assertEqual('2?0-SNA*', version_glob('^2.0-SNAP+'))
+        self.assertEqual('1?*', version_glob(r'1.2?\d'))
+        self.assertEqual('1*', version_glob(r'1\d+'))
+        self.assertIsNone(version_glob('1.0|2.0'))
+        self.assertIsNone(version_glob('.*-SNAPSHOT'))
+        self.assertIsNone(version_glob('[12].0'))
+        self.assertEqual('3?0-*', version_glob('3.0-(alpha|beta)'))
+
+    def test_plan_queries_must_fan_out_by_group(self):
+        maven = get_format('maven2')
+        self.assertEqual([], plan_queries(maven, version_pattern='.*'))
+        self.assertEqual([{'version_glob': '1?1*'}], plan_queries(maven, version_pattern='1.1'))
+        self.assertEqual([{'version_glob': '1?1*', 'group': 'org.a'}, {'version_glob': '1?1*', 'group': 'org.b.*'}],
+                         plan_queries(maven, '1.1', groups=split_groups('org.a, org.b.*')))
+        self.assertEqual([{'version': '1.0'}], plan_queries(maven, version='1.0'))
+        # docker images have no group: listed then filtered
+        self.assertEqual([{'version_glob': '1?1*'}],
+                         plan_queries(get_format('docker'), '1.1', groups=['library']))
+        self.assertEqual([], plan_queries(get_format('raw'), '1.1'))
+
+    def test_residual_filter_must_apply_the_regex_and_the_groups_once(self):
+        # Given
+        components = [{'id': 'c1', 'group': 'org.a', 'version': '1.10'},
+                      {'id': 'c2', 'group': 'org.a', 'version': '1x1'},
+                      {'id': 'c3', 'group': 'org.b', 'version': '1.1'},
+                      {'id': 'c1', 'group': 'org.a', 'version': '1.10'}]
+
+        # When
+        result = [c['id'] for c in residual_filter(components, r'1\.1', ['org.a'], unique=True)]
+
+        # Then
+        self.assertEqual(['c1'], result)
+
+    def test_version_pattern_must_be_searched_in_each_group(self):
+        # Given
+        with MockNexus(components=3000, page_size=20) as nexus:
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, parallelism=4)
+            try:
+                # When
+                report = handler.delete_all_component_by_version_pattern(r'1\.1\.[23]', 'org.example.g2,org.example.g3')
+            finally:
+                handler.close()
+
+            # Then
+            self.assertEqual(200, report.deleted)
+            self.assertEqual(0, nexus.counts[("GET", "v1/components")])
+            self.assertEqual(10, nexus.counts[("GET", "v1/search")])
+            self.assertFalse([c for c in nexus.components if c['version'] in ('1.1.2', '1.1.3')
+                              and c['group'] in ('org.example.g2', 'org.example.g3')])
+
+    def test_pushdown_must_delete_like_the_client_side_filter(self):
+        for pushdown in (True, False):
+            with MockNexus(components=2000, page_size=50) as nexus:
+                handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, dry_run=True,
+                                               show_progress=False, pushdown=pushdown)
+                try:
+                    planned = sorted(c['id'] for c in handler._plan(version_pattern='1.0.[1-3]', group='*.g1'))
+                finally:
+                    handler.close()
+            self.assertEqual(100, len(planned))
+            self.assertEqual(pushdown, nexus.counts[("GET", "v1/components")] == 0)
+
+    def test_offline_index_must_search_with_globs(self):
+        with tempfile.TemporaryDirectory() as directory, MockNexus(components=100, page_size=50) as nexus:
+            index = ComponentIndex(os.path.join(directory, 'index.db'))
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, index=index)
+            list(handler._iter_components(handler._get_all_components))
+            handler.close()
+
+            pages = ComponentIndex(os.path.join(directory, 'index.db')).iter_component_pages(
+                nexus.repository, group='org.example.g[12]', version_glob='1?0?2*')
+            self.assertEqual({'c%d' % i for i in range(2, 100, 10)}, {c['id'] for page in pages for c in page})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import datetime
+import unittest
+from nexushousekeeper import retention
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+
+
+class RetentionTest(unittest.TestCase):
+
+    def test_last_versions_must_compare_versions_numerically(self):
+        # Given
+        components = [{'name': 'module1', 'version': v, 'id': str(i), 'group': 'kawamind'}
+                      for i, v in enumerate(['2.9', '2.10', '2.8', '2.11-20201208.121756-1'])]
+
+        # When
+        result = retention.last_versions(components, 2)
+
+        # Then
+        self.assertEqual(['2.11-20201208.121756-1', '2.10'], [c['version'] for c in result])
+
+    def test_timeline_must_release_components_as_soon_as_they_are_out(self):
+        # Given
+        timeline = retention.VersionTimeline(last=2)
+        versions = ['1.0', '1.1-20201208.121756-1', '1.1-20201208.134457-2', '1.2', '0.9', 'feature-foo', '1.3']
+
+        # When
+        released = [[c['version'] for c in timeline.add({'id': str(i), 'group': 'g', 'name': 'a', 'version': v})]
+                    for i, v in enumerate(versions)]
+
+        # Then
+        self.assertEqual([[], [], ['1.1-20201208.121756-1'], ['1.0'], ['0.9'], ['feature-foo'],
+                          ['1.1-20201208.134457-2']], released)
+        self.assertEqual(['1.3', '1.2'], [c['version'] for c in timeline.kept()])
+
+    def test_timeline_must_keep_a_release_listed_before_its_pre_release(self):
+        # Given
+        timeline = retention.VersionTimeline(last=3)
+
+        # When
+        released = [timeline.add({'id': str(i), 'group': 'g', 'name': 'a', 'version': v})
+                    for i, v in enumerate(['1.0', '1.0-rc1'])]
+
+        # Then
+        self.assertEqual([[], [{'id': '1', 'group': 'g', 'name': 'a', 'version': '1.0-rc1'}]], released)
+        self.assertEqual(['1.0'], [c['version'] for c in timeline.kept()])
+
+    def test_timeline_must_only_release_old_components(self):
+        # Given
+        timeline = retention.VersionTimeline(last=1, older_than=datetime.datetime(2021, 1, 1,
+                                                                                  tzinfo=datetime.timezone.utc))
+        components = [{'id': str(i), 'group': 'g', 'name': 'a', 'version': v,
+                       'assets': [{'lastModified': modified}]}
+                      for i, (v, modified) in enumerate([('1.0', '2020-06-01T00:00:00.000+00:00'),
+                                                         ('1.1', '2021-02-01T00:00:00.000+00:00'),
+                                                         ('1.2', '2021-03-01T00:00:00.000+00:00')])]
+
+        # When
+        deletable = [c['version'] for c in timeline.deletable(components)]
+
+        # Then
+        self.assertEqual(['1.0'], deletable)
+
+    def test_keep_last_must_delete_while_listing(self):
+        # Given
+        with MockNexus(components=3000, page_size=100) as nexus:
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, prefetch=0,
+                                           show_progress=False)
+            plan = handler._plan(last_version_count=2)
+
+            # When
+            first = next(plan)
+            listed = nexus.counts[("GET", "v1/components")]
+            rest = list(plan)
+            handler.close()
+
+        # Then
+        self.assertTrue(first['version'].startswith('1.0.'))
+        self.assertEqual(21, listed)  # the third version of the first artifact is on page 21 of 30
+        self.assertEqual(1000, len(rest) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
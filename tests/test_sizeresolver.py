@@ -0,0 +1,118 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from nexushousekeeper.httpengine import HttpEngine
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.sizeresolver import AssetSizeResolver, SizeCache
+
+
+class AssetSizeResolverTest(unittest.TestCase):
+
+    def test_resolve_must_use_file_size_without_http_request(self):
+        # Given
+        resolver = AssetSizeResolver(HttpEngine())
+        component = {'assets': [{'downloadUrl': 'mock://testuri/a.jar', 'fileSize': 10},
+                                {'downloadUrl': 'mock://testuri/a.pom', 'fileSize': 5}]}
+
+        # When
+        result = resolver.resolve(component)
+
+        # Then
+        self.assertEqual(15, result)
+        self.assertEqual(0, resolver.head_requests)
+
+    def test_resolve_must_fallback_to_head_for_assets_without_file_size(self):
+        # Given
+        with MockNexus(components=1, assets_per_component=2, asset_size=100, with_file_size=False) as nexus:
+            engine = HttpEngine()
+            resolver = AssetSizeResolver(engine)
+            component = nexus.page(None)['items'][0]
+            component['assets'][0]['fileSize'] = 7
+
+            # When
+            result = resolver.resolve(component)
+            engine.close()
+
+            # Then
+            self.assertEqual(107, result)
+            self.assertEqual(1, resolver.head_requests)
+            self.assertEqual(1, nexus.counts[("HEAD", "asset")])
+
+    def test_cache_must_avoid_head_requests_across_runs_until_the_asset_changes(self):
+        # Given
+        with MockNexus(components=4, assets_per_component=2, asset_size=100, with_file_size=False) as nexus, \
+                tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sizes.db')
+
+            def resolve_all(components):
+                engine = HttpEngine(concurrency=4)
+                resolver = AssetSizeResolver(engine, SizeCache(path))
+
+                async def resolve():
+                    return await asyncio.gather(*[resolver.aresolve(component) for component in components])
+
+                sizes = asyncio.run(resolve())
+                resolver.cache.close()
+                engine.close()
+                return sizes
+
+            resolve_all(nexus.page(None)['items'])
+            nexus.reset_counts()
+            components = nexus.page(None)['items']
+            components[0]['assets'][0]['checksum'] = {'sha1': 'changed'}
+
+            # When
+            sizes = resolve_all(components)
+
+            # Then
+            self.assertEqual([200] * 4, sizes)
+            self.assertEqual(1, nexus.counts[("HEAD", "asset")])
+
+    def test_failed_head_requests_must_not_be_cached(self):
+        # Given
+        with MockNexus(components=3, assets_per_component=2, asset_size=100, with_file_size=False,
+                       error_rate=1.0) as nexus, tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sizes.db')
+
+            def resolve_all():
+                engine = HttpEngine(concurrency=4)
+                resolver = AssetSizeResolver(engine, SizeCache(path))
+                sizes = [resolver.resolve(component) for component in nexus.page(None)['items']]
+                resolver.cache.close()
+                engine.close()
+                return sizes
+
+            failed = resolve_all()
+            nexus.error_rate = 0.0
+            nexus.reset_counts()
+
+            # When
+            sizes = resolve_all()
+
+            # Then
+            self.assertEqual([0] * 3, failed)
+            self.assertEqual([200] * 3, sizes)
+            self.assertEqual(6, nexus.counts[("HEAD", "asset")])
+
+    def test_head_requests_must_back_off_when_throttled(self):
+        # Given
+        with MockNexus(components=30, assets_per_component=2, with_file_size=False, error_rate=0.3) as nexus:
+            engine = HttpEngine(concurrency=8, retries=10, backoff=0.001)
+            resolver = AssetSizeResolver(engine)
+
+            async def resolve():
+                return await asyncio.gather(*[resolver.aresolve(component) for component in nexus.page(None)['items']])
+
+            # When
+            sizes = asyncio.run(resolve())
+            engine.close()
+
+            # Then
+            self.assertEqual([2048] * 10, sizes)
+            self.assertGreater(resolver.limiter.decreases, 0)
+            self.assertGreater(engine.throttled, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
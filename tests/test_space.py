@@ -0,0 +1,104 @@
+import unittest
+
+from nexushousekeeper.mocknexus import MockNexus
+from nexushousekeeper.multirepo import MultiRepositoryHousekeeper
+from nexushousekeeper.mvnrepositoryhandler import MvnRepositoryHandler
+from nexushousekeeper.space import UNKNOWN_BLOB_STORE, SpaceAccount, blob_key, is_sidecar
+
+
+def _asset(path, sha1, file_size, blob_store='default'):
+    return {'path': path, 'checksum': {'sha1': sha1}, 'fileSize': file_size, 'blobStoreName': blob_store}
+
+
+class SpaceAccountTest(unittest.TestCase):
+
+    def test_sidecars_must_be_recognized(self):
+        self.assertTrue(is_sidecar({'path': 'org/example/a/1.0/a-1.0.jar.sha1'}))
+        self.assertTrue(is_sidecar({'path': 'org/example/a/1.0/a-1.0.pom.ASC'}))
+        self.assertFalse(is_sidecar({'path': 'org/example/a/1.0/a-1.0.jar'}))
+
+    def test_blob_key_must_prefer_blob_ref_then_checksum(self):
+        self.assertEqual('default@abc', blob_key({'blobRef': 'default@abc', 'checksum': {'sha1': 'aa'}}))
+        self.assertEqual(b'\xaa', blob_key({'checksum': {'sha1': 'aa', 'md5': 'bb'}}))
+        self.assertIsNone(blob_key({'path': 'a.jar'}))
+
+    def test_shared_blobs_must_be_counted_once_by_blob_store(self):
+        # Given
+        account = SpaceAccount()
+        first = {'assets': [_asset('a-1.0.jar', 'aa', 1000), _asset('a-1.0.jar.sha1', 'a1', 40)]}
+        copy = {'assets': [_asset('b-1.0.jar', 'aa', 1000), _asset('b-1.0.jar.sha1', 'a1', 40)]}
+        elsewhere = {'assets': [_asset('c-1.0.jar', 'aa', 1000, blob_store='s3')]}
+
+        # When
+        reclaimed = [account.add(component) for component in (first, copy, elsewhere)]
+        account.add({'id': 'planned by a journal'}, 500)
+
+        # Then
+        self.assertEqual([1040, 0, 1000], reclaimed)
+        self.assertEqual(3580, account.listed)
+        self.assertEqual(2540, account.reclaimed)
+        default = account.stores['default']
+        self.assertEqual((1000, 40, 2), (default.primary, default.sidecar, default.duplicates))
+        self.assertEqual(500, account.stores[UNKNOWN_BLOB_STORE].reclaimed)
+
+    def test_removed_components_must_not_reclaim_their_blobs(self):
+        # Given
+        account = SpaceAccount()
+        first = {'assets': [_asset('a-1.0.jar', 'aa', 1000), _asset('a-1.0.jar.sha1', 'a1', 40)]}
+        copy = {'assets': [_asset('b-1.0.jar', 'aa', 1000)]}
+        other = {'assets': [_asset('c-1.0.jar', 'cc', 300)]}
+        reclaimed = sum(account.add(component) for component in (first, copy, other))
+        reclaimed += account.add({'id': 'planned by a journal'}, 500)
+
+        # When the copy and the journaled component couldn't be deleted
+        reclaimed -= account.remove(copy)
+        reclaimed -= account.remove({'id': 'planned by a journal'}, 500)
+
+        # Then the blob shared with the copy is still stored
+        self.assertEqual(340, reclaimed)
+        self.assertEqual(340, account.reclaimed)
+        self.assertEqual(1340, account.listed)
+
+    def test_assets_without_size_must_be_ignored(self):
+        # Given
+        account = SpaceAccount()
+
+        # When
+        account.add({'assets': [{'path': 'a.jar', 'checksum': {'sha1': 'aa'}}]})
+
+        # Then
+        self.assertEqual(0, account.reclaimed)
+
+    def test_deletions_of_several_repositories_must_share_the_account(self):
+        # Given the same paths, so the same blobs, in both repositories
+        with MockNexus(components=300, page_size=20, repositories=['maven-a', 'maven-b']) as nexus:
+            housekeeper = MultiRepositoryHousekeeper('user', 'password', nexus.rest_url, 'maven-*', parallelism=4)
+            try:
+                # When
+                reports = housekeeper.delete_all_component_by_version_pattern('1.0.1')
+            finally:
+                housekeeper.close()
+
+        # Then
+        self.assertEqual(2 * 30 * 3 * 1024, sum(report.bytes_freed for report in reports.values()))
+        self.assertEqual(30 * 3 * 1024, sum(report.bytes_reclaimed for report in reports.values()))
+        space = next(iter(reports.values())).space
+        self.assertEqual(90, space.stores['default'].duplicates)
+
+    def test_failed_deletions_must_not_be_reclaimed(self):
+        # Given
+        with MockNexus(components=30, error_rate=0.5) as nexus:
+            handler = MvnRepositoryHandler('user', 'password', nexus.rest_url, nexus.repository, retries=0)
+
+            # When
+            report = handler._delete_components_in_array(list(nexus.components))
+            handler.close()
+
+        # Then
+        self.assertTrue(report.failures)
+        self.assertEqual(report.deleted * 3 * 1024, report.bytes_reclaimed)
+        self.assertEqual(report.space.reclaimed, report.bytes_reclaimed)
+
+
+if __name__ == '__main__':
+    unittest.main()